@@ -0,0 +1,338 @@
+"""
+Shared Cache: thin async wrapper around Redis for results that are
+expensive to recompute (Gemini feedback, report summaries).
+Redis is optional — without it values live in a small per-process
+LRU instead, so single-worker setups still get caching.
+
+An optional semantic layer (SEMANTIC_CACHE=1, needs RediSearch and
+sentence-transformers) also serves near-duplicate prompts by
+embedding similarity.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Optional semantic cache: MiniLM embeddings + a RediSearch vector index
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    from redis.commands.search.field import TagField, TextField, VectorField
+    from redis.commands.search.query import Query
+    try:
+        from redis.commands.search.index_definition import IndexDefinition, IndexType
+    except ImportError:  # redis-py < 6
+        from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+    SEMANTIC_AVAILABLE = REDIS_AVAILABLE
+except ImportError:
+    SEMANTIC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+LOCK_TTL = 30  # seconds a miss-path lock is held before it expires on its own
+LOCK_WAIT = 0.25  # seconds between polls while another worker fills the key
+LOCK_POLLS = 40  # give up waiting after LOCK_WAIT * LOCK_POLLS seconds
+
+# Release only if we still own the lock (it may have expired and been re-taken)
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE", "") == "1"
+SEMANTIC_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Versioned so a tag-schema change builds a fresh index instead of
+# filtering on fields the existing one never indexed
+SEMANTIC_INDEX = "idx:gemini_semantic_v2"
+SEMANTIC_PREFIX = "semcache2:"
+SEMANTIC_DIM = 384
+SEMANTIC_MAX_DISTANCE = 0.1  # cosine distance at or below which a prompt counts as a repeat
+SEMANTIC_TTL = 7 * 86400
+SEMANTIC_TAGS = ("kind", "pattern_set", "severity", "symbol", "grade", "period")
+
+LOCAL_MAX_ENTRIES = 1024  # per-process fallback size when Redis isn't configured
+
+_client = None
+_embedder = None
+_local: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+_refreshing: set = set()  # keys being refreshed ahead of expiry (no-Redis mode)
+_background: set = set()  # strong refs to in-flight refresh tasks
+
+
+def get_redis():
+    """Lazily create the shared Redis client; None when Redis is unavailable."""
+    global _client
+    if _client is None and REDIS_AVAILABLE and REDIS_URL:
+        _client = aioredis.from_url(REDIS_URL)
+    return _client
+
+
+async def close_redis():
+    """Close the shared Redis client, if one was opened."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def content_key(namespace: str, payload: Any) -> str:
+    """Build a cache key from a namespace and a sha256 of the JSON payload."""
+    digest = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+async def get_json_ttl(key: str) -> Tuple[Optional[Any], int]:
+    """
+    Get a JSON value and its remaining TTL in seconds, or (None, -2) on miss
+    or Redis error. Value and TTL come back in one pipelined round trip.
+    """
+    client = get_redis()
+    if client is None:
+        entry = _local.get(key)
+        if entry is None:
+            return None, -2
+        remaining = int(entry[0] - time.time())
+        if remaining < 0:
+            del _local[key]
+            return None, -2
+        _local.move_to_end(key)
+        return entry[1], remaining
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.ttl(key)
+            raw, remaining = await pipe.execute()
+    except Exception as e:
+        logger.warning("Redis GET failed for %s: %s", key, e)
+        return None, -2
+    return (json.loads(raw), remaining) if raw is not None else (None, -2)
+
+
+async def get_json(key: str) -> Optional[Any]:
+    """Get a JSON value, or None on miss or Redis error."""
+    client = get_redis()
+    if client is None:
+        return (await get_json_ttl(key))[0]
+    try:
+        raw = await client.get(key)
+    except Exception as e:
+        logger.warning("Redis GET failed for %s: %s", key, e)
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+async def set_json(key: str, value: Any, ttl: int):
+    """SETEX a JSON value; errors are logged and ignored."""
+    client = get_redis()
+    if client is None:
+        _local[key] = (time.time() + ttl, value)
+        _local.move_to_end(key)
+        while len(_local) > LOCAL_MAX_ENTRIES:
+            _local.popitem(last=False)
+        return
+    try:
+        await client.setex(key, ttl, json.dumps(value))
+    except Exception as e:
+        logger.warning("Redis SETEX failed for %s: %s", key, e)
+
+
+async def _acquire_lock(key: str) -> Optional[str]:
+    """SET NX the miss-path lock for key; returns our token, or None if held elsewhere."""
+    token = uuid.uuid4().hex
+    if await get_redis().set(f"lock:{key}", token, nx=True, ex=LOCK_TTL):
+        return token
+    return None
+
+
+async def _fill(key: str, ttl: int, token: Optional[str], compute, should_cache) -> Any:
+    """Compute and store the value for key, then release our lock (if any)."""
+    try:
+        result = await compute()
+        if should_cache(result):
+            await set_json(key, result, ttl)
+        return result
+    finally:
+        if token is not None:
+            try:
+                await get_redis().eval(_RELEASE_LOCK, 1, f"lock:{key}", token)
+            except Exception as e:
+                logger.warning("Redis lock release failed for %s: %s", key, e)
+        else:
+            _refreshing.discard(key)
+
+
+async def _refresh_ahead(key: str, ttl: int, compute, should_cache):
+    """Recompute a soon-to-expire key in the background, once across workers."""
+    if get_redis() is None:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        token = None
+    else:
+        try:
+            token = await _acquire_lock(key)
+        except Exception as e:
+            logger.warning("Redis lock failed for %s: %s", key, e)
+            return
+        if token is None:
+            return
+
+    task = asyncio.create_task(_fill(key, ttl, token, compute, should_cache))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def cached_call(
+    key: str,
+    ttl: int,
+    compute: Callable[[], Awaitable[Any]],
+    should_cache: Callable[[Any], bool] = lambda result: result is not None,
+    refresh_ahead: int = 0,
+) -> Any:
+    """
+    Return the cached value for key, computing and storing it on a miss.
+
+    The miss path is guarded by a SET NX lock so that concurrent callers
+    don't all hit the backend at once: the lock holder computes the value
+    while the others poll for it, falling back to computing it themselves
+    if it hasn't appeared by the time the wait runs out.
+
+    With refresh_ahead, a hit with fewer than that many seconds left is
+    served as-is while the lock holder recomputes it in the background.
+    """
+    cached, remaining = await get_json_ttl(key)
+    if cached is not None:
+        if 0 <= remaining < refresh_ahead:
+            await _refresh_ahead(key, ttl, compute, should_cache)
+        return cached
+
+    if get_redis() is None:
+        return await _fill(key, ttl, None, compute, should_cache)
+
+    try:
+        token = await _acquire_lock(key)
+    except Exception as e:
+        logger.warning("Redis lock failed for %s: %s", key, e)
+        return await compute()
+
+    if token is None:
+        for _ in range(LOCK_POLLS):
+            await asyncio.sleep(LOCK_WAIT)
+            cached = await get_json(key)
+            if cached is not None:
+                return cached
+        return await compute()
+
+    return await _fill(key, ttl, token, compute, should_cache)
+
+
+# ============================================================================
+# SEMANTIC CACHE
+# ============================================================================
+
+async def init_semantic_cache():
+    """Load the embedding model and create the vector index if missing."""
+    global _embedder
+    client = get_redis()
+    if not (SEMANTIC_CACHE_ENABLED and SEMANTIC_AVAILABLE and client is not None):
+        return
+
+    try:
+        loop = asyncio.get_event_loop()
+        model = await loop.run_in_executor(None, SentenceTransformer, SEMANTIC_MODEL_NAME)
+
+        index = client.ft(SEMANTIC_INDEX)
+        try:
+            await index.info()
+        except Exception:
+            await index.create_index(
+                [
+                    VectorField("vec", "FLAT", {
+                        "TYPE": "FLOAT32", "DIM": SEMANTIC_DIM, "DISTANCE_METRIC": "COSINE",
+                    }),
+                    *(TagField(tag) for tag in SEMANTIC_TAGS),
+                    TextField("prompt"),
+                ],
+                definition=IndexDefinition(prefix=[SEMANTIC_PREFIX], index_type=IndexType.HASH),
+            )
+        _embedder = model
+        logger.info("Semantic cache ready (%s)", SEMANTIC_MODEL_NAME)
+    except Exception as e:
+        logger.warning("Semantic cache disabled: %s", e)
+
+
+def _embed(text: str) -> bytes:
+    vec = _embedder.encode(text, normalize_embeddings=True)
+    return np.asarray(vec, dtype=np.float32).tobytes()
+
+
+def _escape_tag(value: str) -> str:
+    """Escape a value for use inside a RediSearch TAG filter."""
+    return "".join(ch if ch.isalnum() or ch == "_" else f"\\{ch}" for ch in value)
+
+
+async def semantic_call(
+    prompt: str,
+    tags: Dict[str, str],
+    compute: Callable[[], Awaitable[Any]],
+    should_cache: Callable[[Any], bool] = lambda result: result is not None,
+) -> Any:
+    """
+    Serve a stored response whose prompt embedding lies within
+    SEMANTIC_MAX_DISTANCE of this one and whose tags all match; otherwise
+    compute it and store the embedding, prompt and response for SEMANTIC_TTL.
+    Falls straight through to compute() when the semantic cache is off.
+    """
+    client = get_redis()
+    if _embedder is None or client is None:
+        return await compute()
+
+    try:
+        loop = asyncio.get_event_loop()
+        vec = await loop.run_in_executor(None, _embed, prompt)
+        tag_filter = " ".join(f"@{k}:{{{_escape_tag(v)}}}" for k, v in tags.items() if v) or "*"
+        query = (
+            Query(f"({tag_filter})=>[KNN 1 @vec $q AS dist]")
+            .sort_by("dist")
+            .return_fields("response", "dist")
+            .dialect(2)
+        )
+        res = await client.ft(SEMANTIC_INDEX).search(query, query_params={"q": vec})
+        if res.docs and float(res.docs[0].dist) <= SEMANTIC_MAX_DISTANCE:
+            return json.loads(res.docs[0].response)
+    except Exception as e:
+        logger.warning("Semantic cache lookup failed: %s", e)
+        return await compute()
+
+    result = await compute()
+    if should_cache(result):
+        key = f"{SEMANTIC_PREFIX}{uuid.uuid4().hex}"
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={
+                    "vec": vec, "prompt": prompt, "response": json.dumps(result),
+                    **{k: v for k, v in tags.items() if v},
+                })
+                pipe.expire(key, SEMANTIC_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Semantic cache write failed: %s", e)
+    return result
@@ -6,22 +6,97 @@ checklists, mentor triggers, scores, badges, reports, and challenges.
 """
 
 import aiosqlite
+import asyncio
 import os
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 # Database file path (same directory as this module)
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stockmind.db")
 
+# Connections are opened once and reused. WAL lets the pooled readers run
+# alongside a writer; busy_timeout makes concurrent writers wait, not fail.
+DB_POOL_SIZE = 4
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+_pool: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+_pool_open = 0  # connections created so far (idle in _pool or checked out)
+
+
+async def _open_connection() -> aiosqlite.Connection:
+    db = await aiosqlite.connect(DB_PATH)
+    for pragma in _PRAGMAS:
+        await db.execute(pragma)
+    return db
+
+
+@asynccontextmanager
+async def _connect():
+    """Check a pooled connection out for one unit of work, opening up to DB_POOL_SIZE."""
+    global _pool_open
+    if _pool.empty() and _pool_open < DB_POOL_SIZE:
+        _pool_open += 1
+        try:
+            db = await _open_connection()
+        except Exception:
+            _pool_open -= 1
+            raise
+    else:
+        db = await _pool.get()
+
+    try:
+        yield db
+    finally:
+        # Hand the connection back as a fresh one would be: no open
+        # transaction and the default tuple row factory
+        try:
+            if db.in_transaction:
+                await db.rollback()
+            db.row_factory = None
+        except Exception:
+            _pool_open -= 1
+            await db.close()
+        else:
+            _pool.put_nowait(db)
+
+
+async def close_db():
+    """Close every idle pooled connection (call on shutdown)."""
+    global _pool_open
+    while not _pool.empty():
+        await _pool.get_nowait().close()
+        _pool_open -= 1
+
 # Default portfolio values
 DEFAULT_BALANCE = 100000.0
 DEFAULT_CURRENCY = "USD"
 
 
+# Secondary indexes for the time-window and per-symbol reads below. Keys that
+# are already PRIMARY KEY / UNIQUE (sentiment_cache.symbol, daily_scores.date,
+# holdings(symbol, type)) are indexed by SQLite and need nothing extra.
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_mentor_triggers_created ON mentor_triggers(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_mentor_triggers_pattern ON mentor_triggers(pattern_type)",
+    "CREATE INDEX IF NOT EXISTS idx_checklists_created ON trade_checklists(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_journal_created ON trade_journal(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_journal_symbol ON trade_journal(symbol, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_journal_txn ON trade_journal(transaction_id, created_at)",
+]
+
+
 async def init_db():
     """Initialize the database and create tables if they don't exist."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS portfolio (
                 id INTEGER PRIMARY KEY CHECK (id = 1),
@@ -233,6 +308,9 @@ async def init_db():
             )
         """)
 
+        for statement in _INDEXES:
+            await db.execute(statement)
+
         await db.commit()
 
         # Ensure a default portfolio row exists
@@ -254,7 +332,7 @@ async def init_db():
 
 async def get_portfolio() -> Dict[str, Any]:
     """Get portfolio with balance info."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("SELECT * FROM portfolio WHERE id = 1")
         row = await cursor.fetchone()
@@ -275,14 +353,14 @@ async def get_portfolio() -> Dict[str, Any]:
 
 async def save_portfolio(balance: float):
     """Update portfolio balance."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute("UPDATE portfolio SET balance = ? WHERE id = 1", (balance,))
         await db.commit()
 
 
 async def reset_portfolio():
     """Reset portfolio to defaults: clear holdings, transactions, reset balance."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "UPDATE portfolio SET balance = ?, starting_balance = ?, created_at = ? WHERE id = 1",
             (DEFAULT_BALANCE, DEFAULT_BALANCE, datetime.utcnow().isoformat())
@@ -298,25 +376,37 @@ async def reset_portfolio():
 
 async def get_holdings() -> List[Dict[str, Any]]:
     """Get all holdings."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("SELECT * FROM holdings")
         rows = await cursor.fetchall()
-        return [
-            {
-                "symbol": row["symbol"],
-                "type": row["type"],
-                "name": row["name"],
-                "quantity": row["quantity"],
-                "averagePrice": row["average_price"],
-            }
-            for row in rows
-        ]
+        return [_format_holding(row) for row in rows]
+
+
+async def get_holding(symbol: str, type: str) -> Optional[Dict[str, Any]]:
+    """Get a single holding by its (symbol, type) primary key."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            "SELECT * FROM holdings WHERE symbol = ? AND type = ?", (symbol, type)
+        )
+        row = await cursor.fetchone()
+        return _format_holding(row) if row else None
+
+
+def _format_holding(row) -> Dict[str, Any]:
+    return {
+        "symbol": row["symbol"],
+        "type": row["type"],
+        "name": row["name"],
+        "quantity": row["quantity"],
+        "averagePrice": row["average_price"],
+    }
 
 
 async def upsert_holding(symbol: str, type: str, name: str, quantity: float, average_price: float):
     """Insert or update a holding."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO holdings (symbol, type, name, quantity, average_price)
                VALUES (?, ?, ?, ?, ?)
@@ -331,14 +421,14 @@ async def upsert_holding(symbol: str, type: str, name: str, quantity: float, ave
 
 async def delete_holding(symbol: str, type: str):
     """Delete a holding."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute("DELETE FROM holdings WHERE symbol = ? AND type = ?", (symbol, type))
         await db.commit()
 
 
 async def update_holding_quantity(symbol: str, type: str, quantity: float, average_price: float):
     """Update holding quantity and average price."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "UPDATE holdings SET quantity = ?, average_price = ? WHERE symbol = ? AND type = ?",
             (quantity, average_price, symbol, type)
@@ -352,30 +442,42 @@ async def update_holding_quantity(symbol: str, type: str, quantity: float, avera
 
 async def get_transactions() -> List[Dict[str, Any]]:
     """Get all transactions, newest first."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("SELECT * FROM transactions ORDER BY timestamp DESC")
         rows = await cursor.fetchall()
-        return [
-            {
-                "id": row["id"],
-                "symbol": row["symbol"],
-                "name": row["name"],
-                "type": row["type"],
-                "action": row["action"],
-                "quantity": row["quantity"],
-                "price": row["price"],
-                "total": row["total"],
-                "timestamp": row["timestamp"],
-            }
-            for row in rows
-        ]
+        return [_format_transaction(row) for row in rows]
+
+
+async def get_transactions_since(cutoff: str) -> List[Dict[str, Any]]:
+    """Get transactions with timestamp >= cutoff (ISO string), newest first."""
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            "SELECT * FROM transactions WHERE timestamp >= ? ORDER BY timestamp DESC", (cutoff,)
+        )
+        rows = await cursor.fetchall()
+        return [_format_transaction(row) for row in rows]
+
+
+def _format_transaction(row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "symbol": row["symbol"],
+        "name": row["name"],
+        "type": row["type"],
+        "action": row["action"],
+        "quantity": row["quantity"],
+        "price": row["price"],
+        "total": row["total"],
+        "timestamp": row["timestamp"],
+    }
 
 
 async def add_transaction(tx_id: str, symbol: str, name: str, type: str, action: str,
                           quantity: float, price: float, total: float, timestamp: str):
     """Add a new transaction."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "INSERT INTO transactions (id, symbol, name, type, action, quantity, price, total, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (tx_id, symbol, name, type, action, quantity, price, total, timestamp)
@@ -389,7 +491,7 @@ async def add_transaction(tx_id: str, symbol: str, name: str, type: str, action:
 
 async def get_alerts() -> List[Dict[str, Any]]:
     """Get all alerts."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("SELECT * FROM alerts ORDER BY created_at DESC")
         rows = await cursor.fetchall()
@@ -412,7 +514,7 @@ async def get_alerts() -> List[Dict[str, Any]]:
 async def add_alert(alert_id: str, symbol: str, name: str, type: str,
                     target_price: float, condition: str, created_at: str):
     """Add a new alert."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "INSERT INTO alerts (id, symbol, name, type, target_price, condition, active, triggered, created_at) VALUES (?, ?, ?, ?, ?, ?, 1, 0, ?)",
             (alert_id, symbol, name, type, target_price, condition, created_at)
@@ -439,14 +541,14 @@ async def update_alert(alert_id: str, updates: Dict[str, Any]):
         return
 
     values.append(alert_id)
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(f"UPDATE alerts SET {', '.join(set_parts)} WHERE id = ?", values)
         await db.commit()
 
 
 async def delete_alert(alert_id: str):
     """Delete an alert."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute("DELETE FROM alerts WHERE id = ?", (alert_id,))
         await db.commit()
 
@@ -457,7 +559,7 @@ async def delete_alert(alert_id: str):
 
 async def get_watchlist() -> List[Dict[str, Any]]:
     """Get all watchlist items."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("SELECT * FROM watchlist ORDER BY added_at DESC")
         rows = await cursor.fetchall()
@@ -474,7 +576,7 @@ async def get_watchlist() -> List[Dict[str, Any]]:
 
 async def add_watchlist_item(symbol: str, name: str, type: str, added_at: str):
     """Add item to watchlist (ignore if already exists)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "INSERT OR IGNORE INTO watchlist (symbol, name, type, added_at) VALUES (?, ?, ?, ?)",
             (symbol, name, type, added_at)
@@ -484,7 +586,7 @@ async def add_watchlist_item(symbol: str, name: str, type: str, added_at: str):
 
 async def remove_watchlist_item(symbol: str):
     """Remove item from watchlist."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute("DELETE FROM watchlist WHERE symbol = ?", (symbol,))
         await db.commit()
 
@@ -500,7 +602,7 @@ async def add_checklist(
     created_at: str,
 ):
     """Save a trade checklist entry."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO trade_checklists
                (id, transaction_id, symbol, type, action,
@@ -516,7 +618,7 @@ async def add_checklist(
 
 async def get_checklists(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
     """Get checklist history."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM trade_checklists ORDER BY created_at DESC LIMIT ? OFFSET ?",
@@ -548,7 +650,7 @@ async def get_checklists(limit: int = 50, offset: int = 0) -> List[Dict[str, Any
 async def get_checklist_stats(days: int = 30) -> Dict[str, Any]:
     """Get aggregated checklist stats for the given period."""
     cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
 
         cursor = await db.execute(
@@ -590,7 +692,7 @@ async def get_checklist_stats(days: int = 30) -> Dict[str, Any]:
 async def get_checklists_raw(days: int = 30) -> List[Dict[str, Any]]:
     """Get raw checklist data for scoring engine."""
     cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM trade_checklists WHERE created_at >= ? ORDER BY created_at DESC",
@@ -610,7 +712,7 @@ async def add_mentor_trigger(
     created_at: str,
 ):
     """Save a mentor trigger."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO mentor_triggers
                (id, pattern_type, severity, symbol, message, gemini_feedback, dismissed, created_at)
@@ -620,9 +722,28 @@ async def add_mentor_trigger(
         await db.commit()
 
 
+async def add_mentor_triggers_bulk(
+    rows: List[Tuple[str, str, str, Optional[str], str, Optional[str], str]],
+):
+    """Save several mentor triggers in one transaction.
+
+    Each row is (id, pattern_type, severity, symbol, message, gemini_feedback, created_at).
+    """
+    if not rows:
+        return
+    async with _connect() as db:
+        await db.executemany(
+            """INSERT INTO mentor_triggers
+               (id, pattern_type, severity, symbol, message, gemini_feedback, dismissed, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, 0, ?)""",
+            rows,
+        )
+        await db.commit()
+
+
 async def dismiss_mentor_trigger(trigger_id: str):
     """Mark a mentor trigger as dismissed."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "UPDATE mentor_triggers SET dismissed = 1 WHERE id = ?",
             (trigger_id,)
@@ -632,7 +753,7 @@ async def dismiss_mentor_trigger(trigger_id: str):
 
 async def get_mentor_triggers(limit: int = 50) -> List[Dict[str, Any]]:
     """Get mentor trigger history."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM mentor_triggers ORDER BY created_at DESC LIMIT ?",
@@ -657,7 +778,7 @@ async def get_mentor_triggers(limit: int = 50) -> List[Dict[str, Any]]:
 async def get_mentor_triggers_raw(days: int = 30) -> List[Dict[str, Any]]:
     """Get raw mentor triggers for scoring engine."""
     cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM mentor_triggers WHERE created_at >= ?",
@@ -678,7 +799,7 @@ async def upsert_daily_score(
     trade_count: int, active_day: bool,
 ):
     """Insert or update daily scores (idempotent per date)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO daily_scores
                (id, date, risk_score, discipline_score, strategy_score,
@@ -702,7 +823,7 @@ async def upsert_daily_score(
 async def get_daily_scores(days: int = 30) -> List[Dict[str, Any]]:
     """Get daily scores for last N days."""
     cutoff = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM daily_scores WHERE date >= ? ORDER BY date DESC",
@@ -714,7 +835,7 @@ async def get_daily_scores(days: int = 30) -> List[Dict[str, Any]]:
 
 async def get_latest_daily_score() -> Optional[Dict[str, Any]]:
     """Get the most recent daily score."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM daily_scores ORDER BY date DESC LIMIT 1"
@@ -743,7 +864,7 @@ async def upsert_badge(
     qualifying_days: int, first_earned_at: Optional[str], updated_at: str,
 ):
     """Insert or update badge status."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO badges
                (id, badge_type, earned, active, qualifying_days, first_earned_at, last_active_at, updated_at)
@@ -763,7 +884,7 @@ async def upsert_badge(
 
 async def get_badges() -> List[Dict[str, Any]]:
     """Get all badge statuses."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute("SELECT * FROM badges ORDER BY badge_type")
         rows = await cursor.fetchall()
@@ -781,6 +902,14 @@ async def get_badges() -> List[Dict[str, Any]]:
         ]
 
 
+async def get_badges_version() -> str:
+    """Cheap change marker for the badges table: row count + latest updated_at."""
+    async with _connect() as db:
+        cursor = await db.execute("SELECT COUNT(*), MAX(updated_at) FROM badges")
+        count, latest = await cursor.fetchone()
+        return f"{count}:{latest or ''}"
+
+
 # ============================================================================
 # MONTHLY REPORTS
 # ============================================================================
@@ -794,7 +923,7 @@ async def add_monthly_report(
     created_at: str,
 ):
     """Save a monthly report."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO monthly_reports
                (id, period_start, period_end, risk_avg, discipline_avg, strategy_avg,
@@ -810,7 +939,7 @@ async def add_monthly_report(
 
 async def get_latest_report() -> Optional[Dict[str, Any]]:
     """Get the most recent monthly report."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM monthly_reports ORDER BY created_at DESC LIMIT 1"
@@ -823,7 +952,7 @@ async def get_latest_report() -> Optional[Dict[str, Any]]:
 
 async def get_report_history(limit: int = 12) -> List[Dict[str, Any]]:
     """Get report history."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM monthly_reports ORDER BY created_at DESC LIMIT ?",
@@ -865,7 +994,7 @@ async def add_challenge(
     target_value: float, started_at: str, expires_at: str,
 ):
     """Create a new challenge."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO challenges
                (id, challenge_type, title, description, target_value, current_value, status, started_at, expires_at)
@@ -877,7 +1006,7 @@ async def add_challenge(
 
 async def update_challenge(challenge_id: str, current_value: float, status: str, completed_at: Optional[str] = None):
     """Update challenge progress."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             "UPDATE challenges SET current_value = ?, status = ?, completed_at = ? WHERE id = ?",
             (current_value, status, completed_at, challenge_id)
@@ -887,7 +1016,7 @@ async def update_challenge(challenge_id: str, current_value: float, status: str,
 
 async def get_active_challenges() -> List[Dict[str, Any]]:
     """Get active challenges."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM challenges WHERE status = 'active' ORDER BY started_at DESC"
@@ -898,7 +1027,7 @@ async def get_active_challenges() -> List[Dict[str, Any]]:
 
 async def get_challenge_history(limit: int = 20) -> List[Dict[str, Any]]:
     """Get past challenges."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM challenges WHERE status != 'active' ORDER BY completed_at DESC LIMIT ?",
@@ -910,7 +1039,7 @@ async def get_challenge_history(limit: int = 20) -> List[Dict[str, Any]]:
 
 async def get_completed_challenge_count() -> int:
     """Get count of completed challenges."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         cursor = await db.execute(
             "SELECT COUNT(*) as cnt FROM challenges WHERE status = 'completed'"
         )
@@ -947,7 +1076,7 @@ async def add_journal_entry(
     mood: str, note: str, created_at: str,
 ):
     """Save a trade journal entry."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO trade_journal
                (id, transaction_id, symbol, mood, note, created_at)
@@ -959,7 +1088,7 @@ async def add_journal_entry(
 
 async def get_journal_entries(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
     """Get journal entries, newest first."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM trade_journal ORDER BY created_at DESC LIMIT ? OFFSET ?",
@@ -971,7 +1100,7 @@ async def get_journal_entries(limit: int = 50, offset: int = 0) -> List[Dict[str
 
 async def get_journal_entries_for_symbol(symbol: str) -> List[Dict[str, Any]]:
     """Get journal entries for a specific symbol."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM trade_journal WHERE symbol = ? ORDER BY created_at DESC",
@@ -983,7 +1112,7 @@ async def get_journal_entries_for_symbol(symbol: str) -> List[Dict[str, Any]]:
 
 async def get_journal_entries_for_transaction(transaction_id: str) -> List[Dict[str, Any]]:
     """Get journal entries for a specific transaction."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM trade_journal WHERE transaction_id = ? ORDER BY created_at DESC",
@@ -1011,7 +1140,7 @@ def _format_journal_entry(row) -> Dict[str, Any]:
 
 async def get_all_daily_scores() -> List[Dict[str, Any]]:
     """Get all daily scores ordered by date (for behavior tracking)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM daily_scores ORDER BY date ASC"
@@ -1022,7 +1151,7 @@ async def get_all_daily_scores() -> List[Dict[str, Any]]:
 
 async def get_trigger_counts_by_type() -> Dict[str, int]:
     """Get all-time trigger counts grouped by pattern_type."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         cursor = await db.execute(
             "SELECT pattern_type, COUNT(*) as cnt FROM mentor_triggers GROUP BY pattern_type"
         )
@@ -1036,7 +1165,7 @@ async def get_trigger_counts_by_type() -> Dict[str, int]:
 
 async def get_cached_sentiment(symbol: str) -> Optional[Dict[str, Any]]:
     """Get cached sentiment if not expired."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM sentiment_cache WHERE symbol = ?", (symbol.upper(),)
@@ -1050,27 +1179,48 @@ async def get_cached_sentiment(symbol: str) -> Optional[Dict[str, Any]]:
         if expires_at and datetime.utcnow().isoformat() > expires_at:
             return None
 
-        return {
-            "positive_pct": row["positive_pct"] or 0.0,
-            "neutral_pct": row["neutral_pct"] or 0.0,
-            "negative_pct": row["negative_pct"] or 0.0,
-            "mixed_pct": row["mixed_pct"] or 0.0,
-            "mood": row["mood"] or "neutral",
-            "summary": row["summary"] or "",
-            "article_count": row["article_count"] or 0,
-            "classified_articles": json.loads(row["classified_articles"]) if row["classified_articles"] else [],
-            "fetched_at": row["fetched_at"],
-        }
+        return _format_sentiment(row)
+
+
+async def get_cached_sentiment_batch(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get unexpired cached sentiment for several symbols in one query, keyed by the given symbol."""
+    by_upper = {s.upper(): s for s in symbols if s}
+    if not by_upper:
+        return {}
+
+    placeholders = ",".join("?" * len(by_upper))
+    async with _connect() as db:
+        db.row_factory = aiosqlite.Row
+        cursor = await db.execute(
+            f"SELECT * FROM sentiment_cache WHERE symbol IN ({placeholders}) "
+            "AND (expires_at IS NULL OR expires_at = '' OR expires_at >= ?)",
+            (*by_upper, datetime.utcnow().isoformat()),
+        )
+        rows = await cursor.fetchall()
+        return {by_upper[row["symbol"]]: _format_sentiment(row) for row in rows}
+
+
+def _format_sentiment(row) -> Dict[str, Any]:
+    return {
+        "positive_pct": row["positive_pct"] or 0.0,
+        "neutral_pct": row["neutral_pct"] or 0.0,
+        "negative_pct": row["negative_pct"] or 0.0,
+        "mixed_pct": row["mixed_pct"] or 0.0,
+        "mood": row["mood"] or "neutral",
+        "summary": row["summary"] or "",
+        "article_count": row["article_count"] or 0,
+        "classified_articles": json.loads(row["classified_articles"]) if row["classified_articles"] else [],
+        "fetched_at": row["fetched_at"],
+    }
 
 
-async def save_sentiment_cache(symbol: str, data: Dict[str, Any], short_ttl: bool = False):
-    """Save sentiment result to cache. Uses 2h TTL for neutral/empty results, 24h for real data."""
+async def save_sentiment_cache(symbol: str, data: Dict[str, Any], ttl: int = 86400):
+    """Save sentiment result to cache. TTL is in seconds (default 24h)."""
     now = datetime.utcnow()
-    ttl_hours = 2 if short_ttl else 24
-    expires = (now + timedelta(hours=ttl_hours)).isoformat()
+    expires = (now + timedelta(seconds=ttl)).isoformat()
     articles_json = json.dumps(data.get("classified_articles", []))
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO sentiment_cache
                (symbol, positive_pct, neutral_pct, negative_pct, mixed_pct,
@@ -1098,7 +1248,7 @@ async def save_sentiment_cache(symbol: str, data: Dict[str, Any], short_ttl: boo
 
 async def clear_sentiment_cache():
     """Clear all cached sentiment data so fresh fetches happen on next request."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute("DELETE FROM sentiment_cache")
         await db.commit()
     print("[Database] Sentiment cache cleared")
@@ -1107,7 +1257,7 @@ async def clear_sentiment_cache():
 async def save_sentiment_snapshot(symbol: str, data: Dict[str, Any]):
     """Save a daily sentiment snapshot for historical tracking."""
     today = datetime.utcnow().date().isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO sentiment_history
                (symbol, mood, positive_pct, neutral_pct, negative_pct, mixed_pct, summary, snapshot_date)
@@ -1130,7 +1280,7 @@ async def save_sentiment_snapshot(symbol: str, data: Dict[str, Any]):
 async def save_divergence_snapshot(symbol: str, signal: str, price_change_pct: float, sentiment_mood: str):
     """Save a daily divergence snapshot."""
     today = datetime.utcnow().date().isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         await db.execute(
             """INSERT INTO divergence_snapshots
                (symbol, signal, price_change_pct, sentiment_mood, snapshot_date)
@@ -1147,7 +1297,7 @@ async def save_divergence_snapshot(symbol: str, signal: str, price_change_pct: f
 async def get_divergence_history(symbol: str, days: int = 30) -> List[Dict[str, Any]]:
     """Get divergence history for a symbol."""
     cutoff = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM divergence_snapshots WHERE symbol = ? AND snapshot_date >= ? ORDER BY snapshot_date DESC",
@@ -1169,7 +1319,7 @@ async def get_divergence_history(symbol: str, days: int = 30) -> List[Dict[str,
 async def get_sentiment_history(symbol: str, days: int = 30) -> List[Dict[str, Any]]:
     """Get sentiment history snapshots for a symbol."""
     cutoff = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connect() as db:
         db.row_factory = aiosqlite.Row
         cursor = await db.execute(
             "SELECT * FROM sentiment_history WHERE symbol = ? AND snapshot_date >= ? ORDER BY snapshot_date DESC",
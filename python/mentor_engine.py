@@ -4,9 +4,12 @@ and generates educational feedback using Gemini AI.
 """
 
 import os
+import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 
+from database import get_cached_sentiment_batch
+
 # Import Gemini
 try:
     import google.generativeai as genai
@@ -18,6 +21,8 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 if GEMINI_AVAILABLE and GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+GEMINI_MODEL_NAME = 'gemini-2.0-flash-lite'
+
 # Pattern definitions
 PATTERNS = {
     'fomo_buy': {
@@ -292,15 +297,11 @@ async def detect_sentiment_fomo(transactions: List[Dict]) -> List[Dict]:
 
     # Check sentiment for each recently bought symbol
     try:
-        from database import get_cached_sentiment
-        checked_symbols = set()
-        for buy in recent_buys:
-            sym = buy.get('symbol', '')
-            if sym in checked_symbols:
-                continue
-            checked_symbols.add(sym)
-
-            cached = await get_cached_sentiment(sym)
+        # Unique symbols in buy order, fetched in one query
+        symbols = list(dict.fromkeys(buy.get('symbol', '') for buy in recent_buys))
+        cached_map = await get_cached_sentiment_batch(symbols)
+        for sym in symbols:
+            cached = cached_map.get(sym)
             if cached and cached.get('positive_pct', 0) > 70:
                 alerts.append({
                     'pattern_type': 'sentiment_fomo',
@@ -381,38 +382,33 @@ def enrich_alerts_with_history(
     return enriched, improvement_notes
 
 
-async def get_gemini_mentor_feedback(alerts: List[Dict], history_context: Optional[str] = None, sentiment_context: Optional[str] = None) -> Optional[str]:
-    """Generate educational mentor feedback for detected patterns using Gemini."""
-    if not GEMINI_AVAILABLE or not GEMINI_API_KEY or not alerts:
-        return None
+def build_mentor_prompt(alerts: List[Dict], history_context: Optional[str] = None, sentiment_context: Optional[str] = None) -> str:
+    """Compose the Gemini mentor prompt for a set of alerts."""
+    pattern_descriptions = []
+    for a in alerts:
+        pattern_descriptions.append(f"- [{a['severity'].upper()}] {a['message']}")
 
-    try:
-        pattern_descriptions = []
-        for a in alerts:
-            pattern_descriptions.append(f"- [{a['severity'].upper()}] {a['message']}")
+    patterns_text = "\n".join(pattern_descriptions)
 
-        patterns_text = "\n".join(pattern_descriptions)
-
-        history_block = ""
-        if history_context:
-            history_block = f"""
+    history_block = ""
+    if history_context:
+        history_block = f"""
 
 Historical context for this user:
 {history_context}
 
 Use this history to personalize your feedback. Acknowledge improvements and escalate recurring issues."""
 
-        sentiment_block = ""
-        if sentiment_context:
-            sentiment_block = f"""
+    sentiment_block = ""
+    if sentiment_context:
+        sentiment_block = f"""
 
 Current market sentiment context for traded assets:
 {sentiment_context}
 
 Use this sentiment data to provide context but do NOT predict future movement."""
 
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        prompt = f"""You are an educational trading mentor for a virtual paper-trading platform.
+    return f"""You are an educational trading mentor for a virtual paper-trading platform.
 The following behavioral patterns were detected in the user's trading activity:
 
 {patterns_text}{history_block}{sentiment_block}
@@ -425,6 +421,16 @@ Frame everything as educational and informational.
 Return a JSON object with pattern_type as keys and feedback strings as values.
 Return ONLY the JSON. No preamble, no markdown blocks."""
 
+
+async def get_gemini_mentor_feedback(alerts: List[Dict], history_context: Optional[str] = None, sentiment_context: Optional[str] = None) -> Optional[str]:
+    """Generate educational mentor feedback for detected patterns using Gemini."""
+    if not GEMINI_AVAILABLE or not GEMINI_API_KEY or not alerts:
+        return None
+
+    try:
+        model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        prompt = build_mentor_prompt(alerts, history_context, sentiment_context)
+
         response = await model.generate_content_async(prompt)
         text = response.text.strip()
         # Clean markdown if present
@@ -433,7 +439,6 @@ Return ONLY the JSON. No preamble, no markdown blocks."""
         if text.endswith("```"):
             text = text[:-3].strip()
 
-        import json
         return json.loads(text)
     except Exception as e:
         print(f"Gemini mentor feedback error: {e}")
@@ -19,6 +19,8 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 if GEMINI_AVAILABLE and GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+GEMINI_MODEL_NAME = 'gemini-2.0-flash-lite'
+
 
 # Badge definitions: score dimension, threshold, required qualifying days out of 30
 BADGE_DEFINITIONS = {
@@ -353,7 +355,7 @@ def compute_overall_grade(scores: Dict[str, float]) -> str:
         return 'F'
 
 
-async def generate_report_summary(
+def build_report_prompt(
     scores: Dict[str, float],
     grade: str,
     patterns: List[str],
@@ -365,59 +367,53 @@ async def generate_report_summary(
     trade_stats: Optional[Dict] = None,
     sentiment_context: Optional[str] = None,
 ) -> str:
-    """Generate Gemini summary for monthly report."""
-    if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
-        return f"Overall grade: {grade}. Keep practicing to improve your trading skills."
-
-    try:
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-
-        # Build enrichment sections
-        trend_section = ""
-        if trend_data:
-            current = trend_data.get('current', {})
-            previous = trend_data.get('previous', {})
-            if current or previous:
-                lines = []
-                for dim in ['risk', 'discipline', 'strategy', 'psychology', 'consistency']:
-                    c = current.get(dim, 0)
-                    p = previous.get(dim, 0)
-                    diff = c - p
-                    arrow = "↑" if diff > 0 else ("↓" if diff < 0 else "→")
-                    lines.append(f"  {dim.title()}: {c:.0f} (prev: {p:.0f}, {arrow}{abs(diff):.0f})")
-                trend_section = "\nScore Trends (current vs previous 30 days):\n" + "\n".join(lines)
-
-        pattern_section = ""
-        if pattern_frequency:
-            items = [f"  {pt}: {count}x" for pt, count in pattern_frequency.items()]
-            if items:
-                pattern_section = "\nPattern Frequency (30 days):\n" + "\n".join(items)
-
-        checklist_section = ""
-        if checklist_stats:
-            checklist_section = f"""
+    """Compose the Gemini prompt for a monthly report summary."""
+    # Build enrichment sections
+    trend_section = ""
+    if trend_data:
+        current = trend_data.get('current', {})
+        previous = trend_data.get('previous', {})
+        if current or previous:
+            lines = []
+            for dim in ['risk', 'discipline', 'strategy', 'psychology', 'consistency']:
+                c = current.get(dim, 0)
+                p = previous.get(dim, 0)
+                diff = c - p
+                arrow = "↑" if diff > 0 else ("↓" if diff < 0 else "→")
+                lines.append(f"  {dim.title()}: {c:.0f} (prev: {p:.0f}, {arrow}{abs(diff):.0f})")
+            trend_section = "\nScore Trends (current vs previous 30 days):\n" + "\n".join(lines)
+
+    pattern_section = ""
+    if pattern_frequency:
+        items = [f"  {pt}: {count}x" for pt, count in pattern_frequency.items()]
+        if items:
+            pattern_section = "\nPattern Frequency (30 days):\n" + "\n".join(items)
+
+    checklist_section = ""
+    if checklist_stats:
+        checklist_section = f"""
 Checklist Statistics (30 days):
   Total checklists: {checklist_stats.get('totalChecklists', 0)}
   Completion rate: {checklist_stats.get('completionRate', 0)}%
   Skip rate: {checklist_stats.get('skipRate', 0)}%
   Avg items checked: {checklist_stats.get('averageItemsChecked', 0)}/5"""
 
-        trade_section = ""
-        if trade_stats:
-            trade_section = f"""
+    trade_section = ""
+    if trade_stats:
+        trade_section = f"""
 Trade Statistics (30 days):
   Total trades: {trade_stats.get('total', 0)}
   Buys: {trade_stats.get('buys', 0)}, Sells: {trade_stats.get('sells', 0)}
   Avg holding duration: {trade_stats.get('avgHoldingDays', 'N/A')} days"""
 
-        sentiment_section = ""
-        if sentiment_context:
-            sentiment_section = f"""
+    sentiment_section = ""
+    if sentiment_context:
+        sentiment_section = f"""
 Market Context (sentiment during this period):
 {sentiment_context}
 Note: Sentiment data is descriptive only — do not predict future movement."""
 
-        prompt = f"""You are an educational trading mentor reviewing a student's monthly performance.
+    return f"""You are an educational trading mentor reviewing a student's monthly performance.
 
 Scores (0-100):
 - Risk Management: {scores.get('risk', 0):.0f}
@@ -438,11 +434,47 @@ and give 1-2 actionable tips for the next month.
 Do NOT give buy/sell advice or predict prices.
 Do NOT suggest specific trades. Keep it educational and encouraging."""
 
+
+async def generate_report_summary(
+    scores: Dict[str, float],
+    grade: str,
+    patterns: List[str],
+    best_trade: Optional[Dict],
+    worst_trade: Optional[Dict],
+    trend_data: Optional[Dict] = None,
+    pattern_frequency: Optional[Dict[str, int]] = None,
+    checklist_stats: Optional[Dict] = None,
+    trade_stats: Optional[Dict] = None,
+    sentiment_context: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Generate Gemini summary for monthly report. Returns None when Gemini is
+    unavailable or fails, so callers don't cache the canned fallback.
+    """
+    if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
+        return None
+
+    try:
+        model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        prompt = build_report_prompt(
+            scores, grade, patterns, best_trade, worst_trade,
+            trend_data=trend_data,
+            pattern_frequency=pattern_frequency,
+            checklist_stats=checklist_stats,
+            trade_stats=trade_stats,
+            sentiment_context=sentiment_context,
+        )
+
         response = await model.generate_content_async(prompt)
         return response.text.strip()
     except Exception as e:
         print(f"Gemini report summary error: {e}")
-        return f"Overall grade: {grade}. Keep practicing to improve your trading skills."
+        return None
+
+
+def fallback_report_summary(grade: str) -> str:
+    """Report summary used when Gemini can't provide one."""
+    return f"Overall grade: {grade}. Keep practicing to improve your trading skills."
 
 
 async def compute_trader_profile(
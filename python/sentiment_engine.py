@@ -10,6 +10,7 @@ import asyncio
 import httpx
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
 from html import unescape
 
@@ -20,9 +21,17 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+# Optional compiled keyword scorer (build with: cythonize -i python/sentiment_score.pyx)
+try:
+    from sentiment_score import score_text as _score_text_compiled
+except ImportError:
+    _score_text_compiled = None
+
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
+from database import get_cached_sentiment, save_sentiment_cache, save_sentiment_snapshot
+
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 NEWS_API_KEY = os.environ.get("NEWS_API_KEY", "")
 
@@ -32,29 +41,65 @@ if GEMINI_AVAILABLE and GEMINI_API_KEY:
 if not GEMINI_API_KEY:
     print("[Sentiment] WARNING: No GEMINI_API_KEY found in environment")
 
-# Keyword lists for fallback sentiment classification
-POSITIVE_KEYWORDS = {
-    "rally", "surge", "gain", "rise", "jump", "soar", "beat", "upgrade",
-    "record", "growth", "profit", "bullish", "boost", "high", "strong",
-    "recover", "outperform", "optimistic", "expand", "breakthrough",
-}
-NEGATIVE_KEYWORDS = {
-    "fall", "drop", "decline", "crash", "loss", "plunge", "miss", "downgrade",
-    "cut", "weak", "bear", "bearish", "sell-off", "selloff", "low", "slump",
-    "tumble", "warning", "layoff", "recession", "default", "bankruptcy",
-}
-
-# Default neutral result for fallback
-NEUTRAL_RESULT = {
-    "positive_pct": 0.0,
-    "neutral_pct": 100.0,
-    "negative_pct": 0.0,
-    "mixed_pct": 0.0,
-    "mood": "neutral",
-    "summary": "Insufficient news data available for sentiment analysis.",
-    "article_count": 0,
-    "classified_articles": [],
-}
+# Pooled client shared with the server (set on startup); created lazily otherwise
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def set_http_client(client: httpx.AsyncClient) -> None:
+    """Use the app-lifetime HTTP client for news fetches."""
+    global _HTTP_CLIENT
+    _HTTP_CLIENT = client
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(timeout=15)
+    return _HTTP_CLIENT
+
+# Keyword lists for fallback sentiment classification, ordered so the words
+# most common in financial headlines are tested first
+POS_FREQ_ORDER = (
+    "gain", "rise", "high", "growth", "record", "strong", "profit", "surge",
+    "jump", "rally", "beat", "boost", "upgrade", "expand", "recover", "soar",
+    "outperform", "bullish", "optimistic", "breakthrough",
+)
+NEG_FREQ_ORDER = (
+    "fall", "drop", "low", "cut", "loss", "decline", "miss", "weak", "warning",
+    "slump", "plunge", "bear", "crash", "tumble", "downgrade", "layoff",
+    "sell-off", "selloff", "bearish", "recession", "default", "bankruptcy",
+)
+POSITIVE_KEYWORDS = frozenset(POS_FREQ_ORDER)
+NEGATIVE_KEYWORDS = frozenset(NEG_FREQ_ORDER)
+
+# Sentiment cache TTL tiers (seconds)
+SENTIMENT_TTL_SHORT = 3600      # neutral / thin coverage — re-check soon
+SENTIMENT_TTL_MEDIUM = 43200    # mixed or busy news flow
+SENTIMENT_TTL_LONG = 86400      # clear, high-confidence mood
+
+# Cap on concurrent symbols processed by get_sentiment_batch
+SENTIMENT_BATCH_CONCURRENCY = 8
+_sentiment_batch_sem = asyncio.Semaphore(SENTIMENT_BATCH_CONCURRENCY)
+
+
+def _neutral() -> Dict[str, Any]:
+    """Default neutral result for fallback (fresh dict and list on every call)."""
+    return {
+        "positive_pct": 0.0,
+        "neutral_pct": 100.0,
+        "negative_pct": 0.0,
+        "mixed_pct": 0.0,
+        "mood": "neutral",
+        "summary": "Insufficient news data available for sentiment analysis.",
+        "article_count": 0,
+        "classified_articles": [],
+    }
+
+
+@lru_cache(maxsize=4096)
+def _normalize_title(title: str) -> str:
+    """Normalize an article title for matching Gemini output to source articles."""
+    return title.strip().lower()
 
 
 async def fetch_news_google_rss(
@@ -74,9 +119,8 @@ async def fetch_news_google_rss(
     url = f"https://news.google.com/rss/search?q={search_query}&hl=en&gl=US&ceid=US:en"
 
     try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
+        resp = await _get_http_client().get(url, timeout=15, follow_redirects=True)
+        resp.raise_for_status()
 
         root = ET.fromstring(resp.text)
         articles = []
@@ -147,19 +191,19 @@ async def fetch_news_for_symbol(
     from_date = (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%d")
 
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(
-                "https://newsapi.org/v2/everything",
-                params={
-                    "q": search_query,
-                    "from": from_date,
-                    "sortBy": "relevancy",
-                    "language": "en",
-                    "pageSize": 20,
-                    "apiKey": NEWS_API_KEY,
-                },
-            )
-            data = resp.json()
+        resp = await _get_http_client().get(
+            "https://newsapi.org/v2/everything",
+            params={
+                "q": search_query,
+                "from": from_date,
+                "sortBy": "relevancy",
+                "language": "en",
+                "pageSize": 20,
+                "apiKey": NEWS_API_KEY,
+            },
+            timeout=15,
+        )
+        data = resp.json()
 
         if data.get("status") != "ok":
             print(f"[Sentiment] NewsAPI error for {symbol}: {data.get('message', 'unknown')}")
@@ -201,6 +245,24 @@ async def fetch_news_for_symbol(
         return await fetch_news_google_rss(symbol, company_name)
 
 
+def _keyword_counts(text: str) -> tuple:
+    """Count negative then positive keyword hits in lowercased text.
+    The positive scan stops as soon as pos > neg, since the label is then
+    decided ("positive") — the resulting classification is unchanged.
+    """
+    neg = 0
+    for kw in NEG_FREQ_ORDER:
+        if kw in text:
+            neg += 1
+    pos = 0
+    for kw in POS_FREQ_ORDER:
+        if kw in text:
+            pos += 1
+            if pos > neg:
+                break
+    return pos, neg
+
+
 def classify_sentiment_keywords(
     articles: List[Dict[str, str]], symbol: str
 ) -> Dict[str, Any]:
@@ -208,15 +270,17 @@ def classify_sentiment_keywords(
     Counts positive/negative financial keyword hits per article.
     """
     if not articles:
-        return {**NEUTRAL_RESULT}
+        return _neutral()
 
     classified = []
     counts = {"positive": 0, "negative": 0, "neutral": 0, "mixed": 0}
 
     for art in articles[:20]:
         text = f"{art.get('title', '')} {art.get('description', '')}".lower()
-        pos = sum(1 for kw in POSITIVE_KEYWORDS if kw in text)
-        neg = sum(1 for kw in NEGATIVE_KEYWORDS if kw in text)
+        if _score_text_compiled is not None:
+            pos, neg = _score_text_compiled(text, POS_FREQ_ORDER, NEG_FREQ_ORDER)
+        else:
+            pos, neg = _keyword_counts(text)
 
         if pos > neg:
             sentiment = "positive"
@@ -266,6 +330,57 @@ def classify_sentiment_keywords(
     }
 
 
+_GEMINI_MODEL = None
+
+
+def _get_model():
+    """Return the shared Gemini model, creating it on first use."""
+    global _GEMINI_MODEL
+    if _GEMINI_MODEL is None:
+        _GEMINI_MODEL = genai.GenerativeModel(
+            "gemini-2.0-flash-lite",
+            generation_config={"response_mime_type": "application/json", "temperature": 0.2},
+        )
+    return _GEMINI_MODEL
+
+
+async def _read_json_stream(response) -> str:
+    """Consume a streamed Gemini response only until its top-level JSON object closes.
+    Tracks brace depth (ignoring braces inside string literals) and stops reading
+    as soon as the outermost object is balanced. Anything before the first "{"
+    (e.g. a markdown fence) is skipped.
+    """
+    out: List[str] = []
+    depth = 0
+    in_string = False
+    escaped = False
+
+    async for chunk in response:
+        for ch in chunk.text:
+            if depth == 0:
+                if ch != "{":
+                    continue
+            out.append(ch)
+
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return "".join(out)
+
+    return "".join(out)
+
+
 async def classify_sentiment_gemini(
     articles: List[Dict[str, str]], symbol: str
 ) -> Dict[str, Any]:
@@ -277,7 +392,7 @@ async def classify_sentiment_gemini(
         return classify_sentiment_keywords(articles, symbol)
 
     if not articles:
-        return {**NEUTRAL_RESULT}
+        return _neutral()
 
     # Build article list for the prompt
     article_lines = []
@@ -317,17 +432,9 @@ Rules:
 - Return ONLY the JSON. No preamble, no markdown blocks."""
 
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash-lite")
-        response = await model.generate_content_async(prompt)
-        text = response.text.strip()
-
-        # Clean markdown wrappers
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-        if text.endswith("```"):
-            text = text[:-3].strip()
-        if text.startswith("json"):
-            text = text[4:].strip()
+        model = _get_model()
+        response = await model.generate_content_async(prompt, stream=True)
+        text = await _read_json_stream(response)
 
         result = json.loads(text)
 
@@ -342,14 +449,14 @@ Rules:
 
         # Merge full metadata back into Gemini's classified articles
         # (Gemini only returns title/sentiment/source — enrich with url, description, etc.)
-        article_lookup = {}
-        for art in articles[:20]:
-            article_lookup[art.get("title", "").strip().lower()] = art
+        article_lookup = {
+            _normalize_title(art["title"]): art
+            for art in articles[:20] if art.get("title")
+        }
 
         for classified in result["classified_articles"]:
-            key = classified.get("title", "").strip().lower()
-            if key in article_lookup:
-                orig = article_lookup[key]
+            key = _normalize_title(classified.get("title", ""))
+            if (orig := article_lookup.get(key)):
                 classified.setdefault("url", orig.get("url", ""))
                 classified.setdefault("description", orig.get("description", ""))
                 classified.setdefault("publishedAt", orig.get("publishedAt", ""))
@@ -364,12 +471,25 @@ Rules:
         return classify_sentiment_keywords(articles, symbol)
 
 
+def choose_ttl(result: Dict[str, Any]) -> int:
+    """Pick a cache TTL based on how settled the sentiment result looks.
+    Thin or neutral coverage expires quickly; a clear dominant mood is kept longest.
+    """
+    article_count = result.get("article_count", 0)
+    mood = result.get("mood", "neutral")
+    confidence = result.get("confidence", 0.0)
+
+    if article_count < 5 or mood == "neutral":
+        return SENTIMENT_TTL_SHORT
+    if mood == "mixed" or confidence < 0.6:
+        return SENTIMENT_TTL_MEDIUM
+    return SENTIMENT_TTL_LONG
+
+
 async def get_sentiment(symbol: str, company_name: str) -> Dict[str, Any]:
     """Main orchestrator: check cache -> fetch news -> classify -> cache -> return.
-    Uses database cache with 24h TTL.
+    Uses database cache with a 1h-24h TTL chosen by choose_ttl().
     """
-    from database import get_cached_sentiment, save_sentiment_cache, save_sentiment_snapshot
-
     # 1. Check cache (invalidate stale entries missing enriched fields)
     cached = await get_cached_sentiment(symbol)
     if cached:
@@ -389,15 +509,21 @@ async def get_sentiment(symbol: str, company_name: str) -> Dict[str, Any]:
     # 3. Classify
     if not articles:
         print(f"[Sentiment] No articles found for {symbol} — returning neutral")
-        result = {**NEUTRAL_RESULT}
+        result = _neutral()
     else:
         print(f"[Sentiment] Classifying {len(articles)} articles for {symbol} with Gemini...")
         result = await classify_sentiment_gemini(articles, symbol)
         print(f"[Sentiment] Classification complete for {symbol} — mood: {result.get('mood')}")
 
-    # 4. Cache result (short TTL for neutral/empty, full TTL for real results)
-    is_empty = result.get("article_count", 0) == 0
-    await save_sentiment_cache(symbol, result, short_ttl=is_empty)
+    # Dominant-category share (0-1), kept on the result for debugging cache tiers
+    result["confidence"] = round(max(
+        result.get("positive_pct", 0), result.get("neutral_pct", 0),
+        result.get("negative_pct", 0), result.get("mixed_pct", 0),
+    ) / 100, 3)
+
+    # 4. Cache result (tiered TTL by article count, mood, and confidence)
+    ttl = choose_ttl(result)
+    await save_sentiment_cache(symbol, result, ttl=ttl)
 
     # 5. Save historical snapshot
     await save_sentiment_snapshot(symbol, result)
@@ -420,13 +546,17 @@ async def get_sentiment_batch(
             symbols.append(sym)
             tasks.append(get_sentiment(sym, name))
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def _bounded(coro):
+        async with _sentiment_batch_sem:
+            return await coro
+
+    results = await asyncio.gather(*(_bounded(t) for t in tasks), return_exceptions=True)
 
     batch_result = {}
     for sym, result in zip(symbols, results):
         if isinstance(result, Exception):
             print(f"Batch sentiment error for {sym}: {result}")
-            batch_result[sym] = {**NEUTRAL_RESULT}
+            batch_result[sym] = _neutral()
         else:
             batch_result[sym] = result
 
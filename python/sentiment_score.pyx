@@ -0,0 +1,28 @@
+# cython: language_level=3
+"""
+Compiled keyword scorer for sentiment_engine.classify_sentiment_keywords.
+Same semantics as sentiment_engine._keyword_counts, without interpreter
+overhead in the inner loop.
+Build in place with: cythonize -i python/sentiment_score.pyx
+"""
+
+
+cpdef tuple score_text(str text, tuple pos_kws, tuple neg_kws):
+    """Return (pos, neg) keyword hit counts for lowercased text.
+    The positive scan stops once pos > neg, matching the pure-Python scorer.
+    """
+    cdef int pos = 0
+    cdef int neg = 0
+    cdef str kw
+
+    for kw in neg_kws:
+        if kw in text:
+            neg += 1
+
+    for kw in pos_kws:
+        if kw in text:
+            pos += 1
+            if pos > neg:
+                break
+
+    return pos, neg
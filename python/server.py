@@ -5,20 +5,62 @@ Uses yfinance as PRIMARY data source (free, no API key required).
 Fallback sources: NSE (Indian stocks), local stock list.
 """
 
-from fastapi import FastAPI, Query, HTTPException, Body
+from fastapi import FastAPI, Query, HTTPException, Body, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from aiolimiter import AsyncLimiter
+import aiohttp
 from typing import Optional, Dict, Any, List
 import httpx
+import orjson
 import json
+import logging
 import os
 import sys
+import tempfile
 import time
 import asyncio
+import hashlib
+import heapq
 import platform
+import random
+import re
 import uuid
-from datetime import datetime, timedelta
-from functools import lru_cache
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, time as dt_time
+from functools import lru_cache, wraps
+from urllib.parse import quote as url_quote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop repeats of the same message template within `window` seconds (e.g. a burst of 429s)."""
+    def __init__(self, window: float = 1.0):
+        super().__init__()
+        self.window = window
+        self._last_seen: Dict[int, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = hash((record.levelno, record.msg))
+        now = time.monotonic()
+        last = self._last_seen.get(key)
+        if last is not None and now - last < self.window:
+            return False
+        self._last_seen[key] = now
+        return True
+
+
+logger.addFilter(RateLimitFilter())
+
+# Timeout context manager: stdlib on 3.11+, async-timeout backport before that
+try:
+    from asyncio import timeout as async_timeout
+except ImportError:
+    from async_timeout import timeout as async_timeout
 
 # Windows-specific event loop policy for better async handling
 if platform.system() == 'Windows':
@@ -27,11 +69,80 @@ if platform.system() == 'Windows':
 # Import yfinance for historical data fallback (per B.md)
 try:
     import yfinance as yf
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     YFINANCE_AVAILABLE = True
 except ImportError:
     print("WARNING: yfinance not installed - no fallback for historical data")
     YFINANCE_AVAILABLE = False
 
+# NumPy (installed alongside pandas/yfinance) speeds up historical payload building
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Shared keep-alive session so every yf.Ticker reuses pooled connections to Yahoo.
+# yfinance >= 0.2.54 only accepts curl_cffi sessions (and depends on curl_cffi),
+# so use one whenever it is installed; older yfinance takes a requests.Session.
+try:
+    from curl_cffi import requests as curl_requests
+    CURL_CFFI_AVAILABLE = True
+except ImportError:
+    CURL_CFFI_AVAILABLE = False
+
+YF_SESSION = None
+if YFINANCE_AVAILABLE:
+    if CURL_CFFI_AVAILABLE:
+        YF_SESSION = curl_requests.Session(impersonate="chrome")
+    else:
+        YF_SESSION = requests.Session()
+        YF_SESSION.mount("https://", HTTPAdapter(
+            pool_connections=50,
+            pool_maxsize=100,
+            # 429s are handled by the yfinance limiter/backoff, not retried here
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503]),
+        ))
+
+
+# Dedicated pool for blocking yfinance/nsetools calls, kept apart from the default executor
+YF_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="yf")
+
+
+def yf_ticker(symbol: str):
+    """yf.Ticker bound to the shared pooled session."""
+    return yf.Ticker(symbol, session=YF_SESSION)
+
+# ULIDs: sortable ids from a single random draw (falls back to ms timestamp + uuid fragment)
+try:
+    from ulid import ULID
+    ULID_AVAILABLE = True
+except ImportError:
+    ULID_AVAILABLE = False
+
+
+def new_id(prefix: str = "") -> str:
+    """Time-ordered unique id for DB rows, e.g. new_id("cl-") -> "cl-01J..."."""
+    if ULID_AVAILABLE:
+        return f"{prefix}{ULID()}"
+    return f"{prefix}{time.time_ns() // 1_000_000}-{uuid.uuid4().hex[:8]}"
+
+
+def new_ids(prefix: str, count: int) -> List[str]:
+    """count ids sharing one new_id() base plus a hex counter, in order."""
+    base = new_id(prefix)
+    return [f"{base}-{i:04x}" for i in range(count)]
+
+# Optional on-disk cache backend so cached quotes survive restarts and are shared across workers
+try:
+    from diskcache import Cache as DiskCache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    print("WARNING: diskcache not installed - price caches will be in-memory only")
+    DISKCACHE_AVAILABLE = False
+
 # Import Gemini for sector classification
 try:
     import google.generativeai as genai
@@ -59,6 +170,10 @@ NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 if GEMINI_AVAILABLE and GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+# One model instance and a small thread pool shared by all competitor classifications
+_GEMINI_MODEL = genai.GenerativeModel('gemini-2.0-flash-lite') if (GEMINI_AVAILABLE and GEMINI_API_KEY) else None
+_GEMINI_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+
 if not GEMINI_API_KEY:
     print("WARNING: No GEMINI_API_KEY found in environment")
 
@@ -68,15 +183,17 @@ print("Using yfinance as primary data source (free, no API key required)")
 # CACHING LAYER - Per B.md: "Cache prices (10-30s)"
 # ============================================================================
 class PriceCache:
-    """Simple in-memory cache with TTL for price data"""
-    def __init__(self, default_ttl: int = 30):
-        self._cache: Dict[str, tuple] = {}  # key -> (value, expiry_time)
+    """In-memory LRU cache with TTL for price data (bounded to max_size entries)"""
+    def __init__(self, default_ttl: int = 30, max_size: int = 4096):
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expiry_time)
         self.default_ttl = default_ttl
+        self.max_size = max_size
 
     def get(self, key: str) -> Optional[Any]:
         if key in self._cache:
             value, expiry = self._cache[key]
             if time.time() < expiry:
+                self._cache.move_to_end(key)
                 return value
             else:
                 del self._cache[key]
@@ -85,51 +202,455 @@ class PriceCache:
     def set(self, key: str, value: Any, ttl: Optional[int] = None):
         expiry = time.time() + (ttl or self.default_ttl)
         self._cache[key] = (value, expiry)
+        self._cache.move_to_end(key)
+        # Evict least recently used entries once over capacity
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def sweep(self) -> int:
+        """Drop all expired entries. Returns the number removed."""
+        now = time.time()
+        expired = [k for k, (_, expiry) in self._cache.items() if expiry <= now]
+        for k in expired:
+            del self._cache[k]
+        return len(expired)
+
+    def delete(self, key: str):
+        self._cache.pop(key, None)
 
     def clear(self):
         self._cache.clear()
 
+
+class DiskPriceCache:
+    """diskcache-backed cache with the same get/set(ttl)/sweep interface as PriceCache"""
+    def __init__(self, directory: str, default_ttl: int = 30, size_limit: int = 64 << 20):
+        self._cache = DiskCache(directory, size_limit=size_limit, eviction_policy="least-recently-used")
+        self.default_ttl = default_ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self._cache.set(key, value, expire=ttl or self.default_ttl)
+
+    def sweep(self) -> int:
+        """Drop all expired entries. Returns the number removed."""
+        return self._cache.expire()
+
+    def delete(self, key: str):
+        self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+
+CACHE_DIR = os.getenv("STOCKMIND_CACHE_DIR", os.path.join(tempfile.gettempdir(), "stockmind_cache"))
+
+
+def make_cache(name: str, default_ttl: int):
+    """Disk-backed cache when diskcache is installed, otherwise in-memory."""
+    if DISKCACHE_AVAILABLE:
+        return DiskPriceCache(os.path.join(CACHE_DIR, name), default_ttl=default_ttl)
+    return PriceCache(default_ttl=default_ttl)
+
 # Cache instances
-quote_cache = PriceCache(default_ttl=30)  # 30 seconds for real-time prices
-historical_cache = PriceCache(default_ttl=300)  # 5 minutes for historical data
-search_cache = PriceCache(default_ttl=300)  # 5 minutes for search results
+quote_cache = make_cache("quote", default_ttl=30)  # 30 seconds for real-time prices
+historical_cache = make_cache("historical", default_ttl=300)  # 5 minutes for historical data
+search_cache = make_cache("search", default_ttl=300)  # 5 minutes for search results
+ticker_meta_cache = make_cache("ticker_meta", default_ttl=86400)  # 24h for yfinance info (name, P/E, description)
+neg_count_cache = make_cache("neg_count", default_ttl=86400)  # consecutive failed lookups per symbol
+
+# Failed quote lookups are cached for 60s, doubling per consecutive miss up to an hour
+QUOTE_NEG_BASE_TTL = 60
+QUOTE_NEG_MAX_TTL = 3600
+
+
+async def get_ticker_info(symbol: str) -> Dict[str, Any]:
+    """yfinance Ticker.info, cached for a day since these fields change slowly."""
+    cache_key = f"info_{symbol.upper()}"
+    cached = ticker_meta_cache.get(cache_key)
+    if cached:
+        return cached
+
+    loop = asyncio.get_event_loop()
+    # .info is the quoteSummary call most prone to 429s, so it shares the limiter and backoff
+    async with yf_slot():
+        try:
+            info = await loop.run_in_executor(YF_EXECUTOR, lambda: yf_ticker(symbol).info or {})
+        except Exception as e:
+            if "429" in str(e):
+                note_yf_rate_limited()
+            raise
+    if info:
+        ticker_meta_cache.set(cache_key, info)
+    return info
+
+
+def disk_cached(namespace: str, ttl_days: float, should_cache=lambda result: True):
+    """
+    Cache an async function's JSON result on disk under CACHE_DIR/<namespace>,
+    keyed by an md5 of the function name and arguments. Entries are written
+    atomically (tmp file + os.replace) and expire after ttl_days.
+    """
+    ttl = ttl_days * 86400
+    directory = os.path.join(CACHE_DIR, namespace)
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = hashlib.md5(f"{fn.__name__}:{args}:{sorted(kwargs.items())}".encode()).hexdigest()
+            path = os.path.join(directory, f"{key}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if time.time() - entry["ts"] < ttl:
+                    return entry["payload"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+            result = await fn(*args, **kwargs)
+            if should_cache(result):
+                try:
+                    os.makedirs(directory, exist_ok=True)
+                    tmp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump({"ts": time.time(), "payload": result}, f)
+                    os.replace(tmp_path, path)
+                except (OSError, TypeError) as e:
+                    print(f"Disk cache write failed for {fn.__name__}: {e}")
+            return result
+        return wrapper
+    return decorator
+
+CACHE_SWEEP_INTERVAL = 60  # seconds between expired-entry sweeps
+
+
+async def _cache_sweeper():
+    """Background task: periodically purge expired entries from all price caches."""
+    while True:
+        await asyncio.sleep(CACHE_SWEEP_INTERVAL)
+        for cache in (quote_cache, historical_cache, search_cache, ticker_meta_cache, neg_count_cache):
+            cache.sweep()
+
+# Rate limiter for yfinance to avoid 429 errors: async token bucket shared
+# by every coroutine, so concurrent callers are throttled cooperatively
+yf_limiter = AsyncLimiter(max_rate=2, time_period=1.0)
+YF_BACKOFF_SECONDS = 10  # base pause after yfinance's info call is rate limited
+_yf_backoff_until = 0.0  # loop time before which no caller starts a yfinance call
+
+
+def note_yf_rate_limited():
+    """Pause every yfinance caller for a jittered YF_BACKOFF_SECONDS after a 429."""
+    global _yf_backoff_until
+    resume = asyncio.get_running_loop().time() + backoff_delay(0, base=YF_BACKOFF_SECONDS)
+    _yf_backoff_until = max(_yf_backoff_until, resume)
 
-# Rate limiter for yfinance to avoid 429 errors
-class YFinanceRateLimiter:
-    """Simple rate limiter with exponential backoff for yfinance"""
-    def __init__(self):
-        self.last_request_time = 0
-        self.min_interval = 0.5  # 500ms between requests
-        self.backoff_until = 0
 
-    def wait_if_needed(self):
-        import time as t
-        now = t.time()
+@asynccontextmanager
+async def yf_slot():
+    """Wait out any shared 429 backoff, then take a yf_limiter token."""
+    loop = asyncio.get_running_loop()
+    while (wait := _yf_backoff_until - loop.time()) > 0:
+        await asyncio.sleep(wait)
+    async with yf_limiter:
+        yield
 
-        # Check if in backoff period
-        if now < self.backoff_until:
-            wait_time = self.backoff_until - now
-            t.sleep(wait_time)
+# Cap on concurrent in-flight yfinance fetches for batch operations
+YF_BATCH_CONCURRENCY = 8
+_yf_batch_sem = asyncio.Semaphore(YF_BATCH_CONCURRENCY)
+
+
+async def _bounded(sem: asyncio.Semaphore, coro):
+    """Await a coroutine while holding a slot on the given semaphore."""
+    async with sem:
+        return await coro
+
+
+async def run_task_group(*coros) -> list:
+    """
+    Run coroutines concurrently and return their results in order. Uses
+    asyncio.TaskGroup where available, so cancelling the caller cancels
+    every child; older interpreters get gather with the same cleanup.
+    """
+    if hasattr(asyncio, "TaskGroup"):
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(c) for c in coros]
+        return [t.result() for t in tasks]
+
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
 
-        # Enforce minimum interval
-        elapsed = now - self.last_request_time
-        if elapsed < self.min_interval:
-            t.sleep(self.min_interval - elapsed)
 
-        self.last_request_time = t.time()
+# In-flight fetches keyed by cache key, so concurrent misses share one upstream call
+_inflight: Dict[str, asyncio.Future] = {}
+_inflight_lock = asyncio.Lock()
 
-    def trigger_backoff(self, seconds: int = 5):
-        import time as t
-        self.backoff_until = t.time() + seconds
 
-yf_rate_limiter = YFinanceRateLimiter()
+class _FetchAbandoned(Exception):
+    """The caller running a coalesced fetch was cancelled before it finished."""
+
+
+async def _coalesced(key: str, fetch):
+    """
+    Run fetch() once per key at a time. Callers arriving while a fetch for
+    the same key is in progress await its result instead of starting their own.
+    If the caller running the fetch is cancelled, the waiters retry rather
+    than inherit its cancellation.
+    """
+    while True:
+        async with _inflight_lock:
+            fut = _inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = asyncio.get_event_loop().create_future()
+                _inflight[key] = fut
+
+        if owner:
+            break
+        try:
+            return await asyncio.shield(fut)
+        except _FetchAbandoned:
+            # Clear the dead entry now; the owner's own cleanup may not have run yet
+            async with _inflight_lock:
+                if _inflight.get(key) is fut:
+                    del _inflight[key]
+
+    try:
+        result = await fetch()
+        fut.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        fut.set_exception(_FetchAbandoned(key))
+        fut.exception()  # mark retrieved so an unawaited future doesn't log a warning
+        raise
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved so an unawaited future doesn't log a warning
+        raise
+    finally:
+        async with _inflight_lock:
+            if _inflight.get(key) is fut:
+                del _inflight[key]
+
+# ============================================================================
+# YAHOO FINANCE HTTP CLIENT - Direct chart endpoint over a shared keep-alive session
+# ============================================================================
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "application/json",
+}
+YAHOO_TIMEOUT = aiohttp.ClientTimeout(total=8)
+
+# 429 handling: exponential backoff with full jitter, honoring Retry-After
+YAHOO_MAX_RETRIES = 3
+YAHOO_MAX_BACKOFF = 30  # seconds
+YAHOO_HOST_CONCURRENCY = 8  # in-flight requests per Yahoo host
+_host_sems: Dict[str, asyncio.Semaphore] = {}
+
+
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    sem = _host_sems.get(host)
+    if sem is None:
+        sem = _host_sems[host] = asyncio.Semaphore(YAHOO_HOST_CONCURRENCY)
+    return sem
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None, base: float = 1.0) -> float:
+    """
+    Seconds to wait before retry number `attempt`: the server's Retry-After
+    if given (in seconds), else base * 2**attempt, jittered by 0.5-1.5x.
+    """
+    try:
+        delay = float(retry_after) if retry_after else base * 2 ** min(attempt, 5)
+    except ValueError:
+        delay = base * 2 ** min(attempt, 5)
+    return min(delay * random.uniform(0.5, 1.5), YAHOO_MAX_BACKOFF)
+
+# Created on startup and reused by quote, historical and search lookups
+AIOHTTP_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it if needed."""
+    global AIOHTTP_SESSION
+    if AIOHTTP_SESSION is None or AIOHTTP_SESSION.closed:
+        AIOHTTP_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100, limit_per_host=20, keepalive_timeout=30, ttl_dns_cache=300,
+            ),
+            headers=YAHOO_HEADERS,
+            timeout=YAHOO_TIMEOUT,
+        )
+    return AIOHTTP_SESSION
+
+
+async def fetch_yahoo_chart(symbol: str, range_: str, interval: str) -> Optional[Dict]:
+    """
+    Fetch chart.result[0] from Yahoo's v8 chart endpoint.
+    Returns None for unknown symbols. 429s are retried with backoff; once
+    retries run out, and for other HTTP errors, raises aiohttp.ClientResponseError.
+    """
+    session = get_http_session()
+    url = YAHOO_CHART_URL.format(symbol=url_quote(symbol, safe=""))
+    sem = _host_semaphore(urlsplit(url).hostname)
+
+    for attempt in range(YAHOO_MAX_RETRIES + 1):
+        async with sem:
+            async with session.get(url, params={"range": range_, "interval": interval}) as resp:
+                if resp.status == 404:
+                    return None
+                if resp.status == 429 and attempt < YAHOO_MAX_RETRIES:
+                    delay = backoff_delay(attempt, resp.headers.get("Retry-After"))
+                else:
+                    resp.raise_for_status()
+                    payload = await resp.json()
+                    break
+        # Sleep outside the host semaphore so other requests can proceed
+        logger.warning("Yahoo 429 for %s, retrying in %.1fs", symbol, delay)
+        await asyncio.sleep(delay)
+
+    results = (payload.get("chart") or {}).get("result") or []
+    return results[0] if results else None
+
+
+def _chart_rows(chart: Dict) -> List[tuple]:
+    """Zip a chart result into (time, open, high, low, close, volume) rows, skipping empty bars."""
+    timestamps = chart.get("timestamp") or []
+    quote = ((chart.get("indicators") or {}).get("quote") or [{}])[0]
+    n = len(timestamps)
+    volumes = quote.get("volume") or [0] * n
+    return [
+        (t, o, h, l, c, v or 0)
+        for t, o, h, l, c, v in zip(
+            timestamps,
+            quote.get("open") or [None] * n,
+            quote.get("high") or [None] * n,
+            quote.get("low") or [None] * n,
+            quote.get("close") or [None] * n,
+            volumes,
+        )
+        if None not in (o, h, l, c)
+    ]
+
+
+def _chart_points(chart: Dict) -> List[Dict]:
+    """
+    Build TradingView points straight from the chart's column arrays in one
+    pass, without materialising intermediate row tuples.
+    """
+    timestamps = chart.get("timestamp") or []
+    quote = ((chart.get("indicators") or {}).get("quote") or [{}])[0]
+    empty = [None] * len(timestamps)
+    if NUMPY_AVAILABLE and timestamps:
+        return _chart_points_np(timestamps, quote, empty)
+    return [
+        {'time': t, 'value': c, 'open': o, 'high': h, 'low': l, 'close': c}
+        for t, o, h, l, c in zip(
+            timestamps,
+            quote.get("open") or empty,
+            quote.get("high") or empty,
+            quote.get("low") or empty,
+            quote.get("close") or empty,
+        )
+        if c is not None and o is not None and h is not None and l is not None
+    ]
+
+
+# Yahoo prices are float32 values widened to float64 (e.g. 187.4499969482422);
+# rounding to this many decimals drops the noise digits from the payload
+PRICE_DECIMALS = 4
+
+
+def _chart_points_np(timestamps: list, quote: Dict, empty: list) -> List[Dict]:
+    """NumPy version of _chart_points: masks empty bars and rounds prices column-wise."""
+    # Stack OHLC into one (4, n) float array; missing bars become NaN
+    ohlc = np.array([
+        quote.get("open") or empty,
+        quote.get("high") or empty,
+        quote.get("low") or empty,
+        quote.get("close") or empty,
+    ], dtype=np.float64)
+    valid = ~np.isnan(ohlc).any(axis=0)
+    ohlc = np.round(ohlc[:, valid], PRICE_DECIMALS)
+
+    times = np.asarray(timestamps, dtype=np.int64)[valid].tolist()
+    opens, highs, lows, closes = ohlc.tolist()
+    return [
+        {'time': t, 'value': c, 'open': o, 'high': h, 'low': l, 'close': c}
+        for t, o, h, l, c in zip(times, opens, highs, lows, closes)
+    ]
+
 
 # ============================================================================
 # BATCH PRICE FETCHER - Efficiently fetch prices for multiple symbols at once
 # ============================================================================
+def _download_prices(symbols: list) -> Dict[str, dict]:
+    """One batched yf.download for all symbols; returns price/change per symbol."""
+    df = yf.download(
+        symbols, period="5d", interval="1d", group_by="ticker",
+        threads=True, progress=False,
+    )
+    prices = {}
+    if df is None or df.empty:
+        return prices
+
+    for sym in symbols:
+        try:
+            frame = df[sym] if df.columns.nlevels > 1 else df
+            closes = frame["Close"].dropna()
+        except KeyError:
+            continue
+        if closes.empty:
+            continue
+        current = float(closes.iloc[-1])
+        prev = float(closes.iloc[-2]) if len(closes) > 1 else current
+        change = current - prev
+        volume = frame["Volume"].get(closes.index[-1]) if "Volume" in frame else None
+        prices[sym] = {
+            "price": current,
+            "change": change,
+            "changePercent": (change / prev * 100) if prev != 0 else 0,
+            "volume": int(volume) if volume is not None and volume == volume else 0,  # NaN-safe
+        }
+    return prices
+
+
+async def get_quotes_batch(symbols: list) -> Dict[str, dict]:
+    """
+    Quotes for many symbols: cached unified quotes where available, the rest
+    from a single batched yf.download. Symbols missing from the result
+    should fall back to get_quote().
+    """
+    results = {}
+    missing = []
+    for sym in symbols:
+        cached = quote_cache.get(f"unified_quote_{sym}")
+        if cached and not cached.get("error"):
+            results[sym] = cached
+        else:
+            missing.append(sym)
+
+    if missing and YFINANCE_AVAILABLE:
+        loop = asyncio.get_event_loop()
+        try:
+            async with yf_slot():
+                results.update(await loop.run_in_executor(YF_EXECUTOR, _download_prices, missing))
+        except Exception as e:
+            logger.warning("yfinance batch quote download failed: %s", e)
+    return results
+
+
 async def fetch_prices_for_symbols(symbols: list) -> Dict[str, dict]:
-    """Batch-fetch prices by reusing fetch_yfinance_quote() in parallel."""
-    if not YFINANCE_AVAILABLE or not symbols:
+    """Batch-fetch prices with a single yf.download call for all uncached symbols."""
+    if not symbols:
         return {}
 
     results = {}
@@ -146,36 +667,50 @@ async def fetch_prices_for_symbols(symbols: list) -> Dict[str, dict]:
     if not symbols_to_fetch:
         return results
 
-    # Fetch in parallel using the proven fetch_yfinance_quote()
-    tasks = [fetch_yfinance_quote(sym) for sym in symbols_to_fetch]
-    fetched = await asyncio.gather(*tasks, return_exceptions=True)
+    if YFINANCE_AVAILABLE:
+        loop = asyncio.get_event_loop()
+        try:
+            async with yf_slot():
+                fetched = await loop.run_in_executor(
+                    YF_EXECUTOR, _download_prices, symbols_to_fetch
+                )
+        except Exception as e:
+            logger.warning("yfinance batch download failed: %s", e)
+            fetched = {}
+    else:
+        fetched = {}
+
+    # Fall back to per-symbol quotes for anything the batch didn't return
+    missing = [sym for sym in symbols_to_fetch if sym not in fetched]
+    if missing:
+        tasks = [_bounded(_yf_batch_sem, fetch_yfinance_quote(sym)) for sym in missing]
+        for sym, result in zip(missing, await asyncio.gather(*tasks, return_exceptions=True)):
+            if isinstance(result, Exception) or result is None or result.get("price") is None:
+                continue
+            fetched[sym] = {
+                "price": result["price"],
+                "change": result.get("change"),
+                "changePercent": result.get("changePercent"),
+            }
 
-    for sym, result in zip(symbols_to_fetch, fetched):
-        if isinstance(result, Exception) or result is None:
-            continue
-        price_data = {
-            "price": result.get("price"),
-            "change": result.get("change"),
-            "changePercent": result.get("changePercent"),
-        }
-        if price_data["price"] is not None:
-            results[sym] = price_data
-            quote_cache.set(f"price_{sym}", price_data, ttl=30)
+    for sym, price_data in fetched.items():
+        results[sym] = price_data
+        quote_cache.set(f"price_{sym}", price_data, ttl=30)
 
     return results
 
 # Import database module
 from database import (
-    init_db, get_portfolio, save_portfolio, reset_portfolio as db_reset_portfolio,
-    get_holdings, upsert_holding, delete_holding, update_holding_quantity,
-    get_transactions, add_transaction,
+    init_db, close_db, get_portfolio, save_portfolio, reset_portfolio as db_reset_portfolio,
+    get_holdings, get_holding, upsert_holding, delete_holding, update_holding_quantity,
+    get_transactions, get_transactions_since, add_transaction,
     get_alerts, add_alert, update_alert, delete_alert,
     get_watchlist, add_watchlist_item, remove_watchlist_item,
     # Mentor & Evaluation
     add_checklist, get_checklists, get_checklist_stats, get_checklists_raw,
-    add_mentor_trigger, dismiss_mentor_trigger, get_mentor_triggers, get_mentor_triggers_raw,
+    add_mentor_triggers_bulk, dismiss_mentor_trigger, get_mentor_triggers, get_mentor_triggers_raw,
     upsert_daily_score, get_daily_scores, get_latest_daily_score,
-    upsert_badge, get_badges,
+    upsert_badge, get_badges, get_badges_version,
     add_monthly_report, get_latest_report, get_report_history,
     add_challenge, update_challenge, get_active_challenges, get_challenge_history,
     get_completed_challenge_count,
@@ -185,19 +720,30 @@ from database import (
     # Behavior tracking
     get_all_daily_scores, get_trigger_counts_by_type,
     # Sentiment
-    get_sentiment_history,
+    get_sentiment_history, get_cached_sentiment_batch, clear_sentiment_cache,
     save_divergence_snapshot,
 )
-from mentor_engine import run_all_checks, get_gemini_mentor_feedback, enrich_alerts_with_history
+from mentor_engine import (
+    run_all_checks, get_gemini_mentor_feedback, enrich_alerts_with_history, build_mentor_prompt,
+    GEMINI_MODEL_NAME as MENTOR_MODEL_NAME,
+)
 from scoring_engine import (
     compute_all_scores, evaluate_badges, compute_overall_grade,
-    generate_report_summary, compute_trader_profile, BADGE_DEFINITIONS,
-    compute_behavior_summary,
+    generate_report_summary, fallback_report_summary, build_report_prompt,
+    compute_trader_profile, BADGE_DEFINITIONS,
+    compute_behavior_summary, check_eligibility, compute_data_sufficiency,
+    GEMINI_MODEL_NAME as REPORT_MODEL_NAME,
 )
 from challenges import CHALLENGE_TEMPLATES, compute_challenge_progress
-from sentiment_engine import get_sentiment, get_sentiment_batch
-
-app = FastAPI(title="StockMind API Server", version="3.0.0")
+from sentiment_engine import get_sentiment, get_sentiment_batch, set_http_client
+from cache import cached_call, semantic_call, content_key, close_redis, init_semantic_cache
+
+# orjson serializes every endpoint's response; FastAPI's jsonable_encoder has
+# already reduced return values to plain JSON types before it runs
+app = FastAPI(
+    title="StockMind API Server", version="3.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -208,6 +754,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Conditional GET for slowly-changing, per-user reads: clients revalidate
+# with If-None-Match and get a bodiless 304 when nothing has changed.
+# no-cache rather than max-age: a journal write or new report must show up
+# on the next read, not after a freshness window.
+HTTP_CACHE_CONTROL = "private, no-cache"
+
+
+def payload_etag(payload) -> str:
+    """Weak ETag from a hash of the serialized payload."""
+    return f'W/"{hashlib.sha1(orjson.dumps(payload)).hexdigest()[:16]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of etag against the request's If-None-Match list."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def conditional_response(request: Request, payload, etag: Optional[str] = None) -> Response:
+    """Return payload with ETag/Cache-Control, or 304 if the client's copy is current."""
+    etag = etag or payload_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": HTTP_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(payload, headers=headers)
+
 # ============================================================================
 # YFINANCE PRIMARY - All stock data from yfinance (FREE, no API key required)
 # ============================================================================
@@ -215,6 +792,61 @@ app.add_middleware(
 # ============================================================================
 # NSE INTEGRATION - Per Prompt.md: "NSE Python library for Indian stocks"
 # ============================================================================
+def safe_float(val, default=0.0):
+    """float(val), or default for None and values that can't be converted."""
+    if val is None:
+        return default
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def safe_int(val, default=0):
+    """int(val), or default for None and values that can't be converted."""
+    if val is None:
+        return default
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return default
+
+
+# (result key, nsetools key, cast, default) for NSE quote fields
+_NSE_FIELDS = (
+    ("price", "lastPrice", float, 0),
+    ("change", "change", float, 0),
+    ("changePercent", "pChange", float, 0),
+    ("previousClose", "previousClose", float, 0),
+    ("dayHigh", "dayHigh", float, 0),
+    ("dayLow", "dayLow", float, 0),
+    ("yearHigh", "high52", float, 0),
+    ("yearLow", "low52", float, 0),
+    ("volume", "quantityTraded", int, 0),
+)
+
+# (result key, yfinance info keys in priority order, cast) for quote metadata
+_INFO_FIELDS = (
+    ("avgVolume", ("averageDailyVolume10Day", "averageVolume"), safe_int),
+    ("marketCap", ("marketCap", "totalAssets"), safe_int),
+    ("pe", ("trailingPE", "forwardPE"), safe_float),
+    ("eps", ("trailingEps",), safe_float),
+    ("dividend", ("dividendRate",), safe_float),
+)
+
+
+def _map_info(info: Dict) -> Dict[str, Any]:
+    """Extract quote metadata (market cap, P/E, dividend, etc.) from yfinance info."""
+    fields = {
+        key: cast(next((info[src] for src in sources if info.get(src)), None))
+        for key, sources, cast in _INFO_FIELDS
+    }
+    raw_dy = safe_float(info.get("dividendYield", 0))
+    fields["dividendYield"] = raw_dy * 100 if raw_dy < 0.20 else raw_dy
+    fields["description"] = info.get("longBusinessSummary", "")
+    return fields
+
+
 async def fetch_nse_quote(symbol: str) -> Optional[Dict]:
     """Fetch stock quote from NSE for Indian stocks"""
     # Check cache first
@@ -231,8 +863,9 @@ async def fetch_nse_quote(symbol: str) -> Optional[Dict]:
         # Remove .NS suffix if present
         clean_symbol = symbol.upper().replace(".NS", "").replace(".BO", "")
 
-        # Fetch quote synchronously (nsetools is not async)
-        quote = nse.get_quote(clean_symbol)
+        # nsetools is not async - run it on the yfinance pool
+        loop = asyncio.get_event_loop()
+        quote = await loop.run_in_executor(YF_EXECUTOR, nse.get_quote, clean_symbol)
 
         if not quote:
             return None
@@ -240,15 +873,7 @@ async def fetch_nse_quote(symbol: str) -> Optional[Dict]:
         result = {
             "symbol": clean_symbol + ".NS",
             "name": quote.get("companyName", clean_symbol),
-            "price": float(quote.get("lastPrice", 0)),
-            "change": float(quote.get("change", 0)),
-            "changePercent": float(quote.get("pChange", 0)),
-            "previousClose": float(quote.get("previousClose", 0)),
-            "dayHigh": float(quote.get("dayHigh", 0)),
-            "dayLow": float(quote.get("dayLow", 0)),
-            "yearHigh": float(quote.get("high52", 0)),
-            "yearLow": float(quote.get("low52", 0)),
-            "volume": int(quote.get("quantityTraded", 0)),
+            **{key: cast(quote.get(src, default)) for key, src, cast, default in _NSE_FIELDS},
             "exchange": "NSE",
             "currency": "INR",
             "source": "nse"
@@ -256,55 +881,32 @@ async def fetch_nse_quote(symbol: str) -> Optional[Dict]:
 
         # Enrich with yfinance metadata (marketCap, P/E, dividend, etc.)
         try:
-            import yfinance as yf
             yf_symbol = clean_symbol + ".NS"
-            ticker = yf.Ticker(yf_symbol)
-            info = ticker.info or {}
+            info = await get_ticker_info(yf_symbol)
 
-            def _safe_float(val, default=0.0):
-                try:
-                    return float(val) if val is not None else default
-                except:
-                    return default
-
-            def _safe_int(val, default=0):
-                try:
-                    return int(val) if val is not None else default
-                except:
-                    return default
-
-            result["marketCap"] = _safe_int(info.get("marketCap") or info.get("totalAssets"))
-            result["pe"] = _safe_float(info.get("trailingPE") or info.get("forwardPE"))
-            result["eps"] = _safe_float(info.get("trailingEps"))
-            result["dividend"] = _safe_float(info.get("dividendRate"))
-            raw_dy = _safe_float(info.get("dividendYield", 0))
-            result["dividendYield"] = raw_dy * 100 if raw_dy < 0.20 else raw_dy
-            result["avgVolume"] = _safe_int(info.get("averageDailyVolume10Day") or info.get("averageVolume"))
-            result["description"] = info.get("longBusinessSummary", "")
+            result.update(_map_info(info))
             # Use yfinance 52-week range if NSE values are 0
             if result["yearHigh"] == 0:
-                result["yearHigh"] = _safe_float(info.get("fiftyTwoWeekHigh"))
+                result["yearHigh"] = safe_float(info.get("fiftyTwoWeekHigh"))
             if result["yearLow"] == 0:
-                result["yearLow"] = _safe_float(info.get("fiftyTwoWeekLow"))
+                result["yearLow"] = safe_float(info.get("fiftyTwoWeekLow"))
             if result["dayHigh"] == 0:
-                result["dayHigh"] = _safe_float(info.get("dayHigh") or info.get("regularMarketDayHigh"))
+                result["dayHigh"] = safe_float(info.get("dayHigh") or info.get("regularMarketDayHigh"))
             if result["dayLow"] == 0:
-                result["dayLow"] = _safe_float(info.get("dayLow") or info.get("regularMarketDayLow"))
-            print(f"NSE quote enriched with yfinance metadata for {yf_symbol}")
-            sys.stdout.flush()
+                result["dayLow"] = safe_float(info.get("dayLow") or info.get("regularMarketDayLow"))
+            logger.debug("NSE quote enriched with yfinance metadata for %s", yf_symbol)
         except Exception as e:
-            print(f"yfinance enrichment failed for {clean_symbol}.NS (non-critical): {e}")
-            sys.stdout.flush()
+            logger.warning("yfinance enrichment failed for %s.NS (non-critical): %s", clean_symbol, e)
 
         # Cache for 30 seconds
         quote_cache.set(cache_key, result, ttl=30)
         return result
 
     except ImportError:
-        print("NSE library not installed. Install with: pip install nsetools")
+        logger.warning("NSE library not installed. Install with: pip install nsetools")
         return None
     except Exception as e:
-        print(f"NSE error for {symbol}: {e}")
+        logger.warning("NSE error for %s: %s", symbol, e)
         return None
 
 def is_indian_stock(symbol: str) -> bool:
@@ -347,6 +949,7 @@ async def get_quote(symbol: str = Query(..., description="Stock symbol")):
     - All others -> yfinance (PRIMARY)
     """
     symbol_upper = symbol.upper()
+    quote_hits[symbol_upper] += 1
 
     # Check quote cache first (unified across sources)
     cache_key = f"unified_quote_{symbol_upper}"
@@ -354,97 +957,186 @@ async def get_quote(symbol: str = Query(..., description="Stock symbol")):
     if cached:
         return cached
 
-    # Strategy 1: Indian stocks -> Try NSE first
-    if is_indian_stock(symbol_upper):
-        result = await fetch_nse_quote(symbol_upper)
-        if result:
-            quote_cache.set(cache_key, result, ttl=30)
-            return result
-        # Fallback to yfinance for Indian stocks
+    async def _load():
+        # Expired quote whose market time hasn't moved can be served again as-is
+        stale = quote_cache.get(f"stale_{cache_key}")
+        if stale and await _quote_unchanged(symbol_upper, stale["marketTime"]):
+            quote_cache.set(cache_key, stale["result"], ttl=30)
+            return stale["result"]
 
-    # Strategy 2: yfinance (PRIMARY for all stocks)
-    result = await fetch_yfinance_quote(symbol_upper)
-    if result:
-        quote_cache.set(cache_key, result, ttl=30)
+        # Strategy 1: Indian stocks -> race NSE and yfinance, preferring NSE
+        if is_indian_stock(symbol_upper):
+            result = await _race_nse_yfinance(symbol_upper)
+        else:
+            # Strategy 2: yfinance (PRIMARY for all stocks)
+            result = await fetch_yfinance_quote(symbol_upper)
+
+        if not result:
+            # Cache the miss so unknown/delisted symbols don't hit Yahoo on every refresh
+            misses = neg_count_cache.get(symbol_upper) or 0
+            neg_count_cache.set(symbol_upper, misses + 1)
+            error = {"error": f"Stock data for '{symbol}' is temporarily unavailable"}
+            quote_cache.set(cache_key, error, ttl=min(QUOTE_NEG_BASE_TTL * 2 ** misses, QUOTE_NEG_MAX_TTL))
+            return error
+
+        if neg_count_cache.get(symbol_upper):
+            neg_count_cache.delete(symbol_upper)
+        _store_quote(cache_key, result)
         return result
 
-    return {"error": f"Stock data for '{symbol}' is temporarily unavailable"}
+    return await _coalesced(cache_key, _load)
 
 
-async def fetch_yfinance_quote(symbol: str) -> Optional[Dict]:
+def _store_quote(cache_key: str, result: Dict):
+    """Cache a fresh quote, plus a long-lived copy for market-time revalidation."""
+    quote_cache.set(cache_key, result, ttl=30)
+    if result.get("marketTime"):
+        quote_cache.set(f"stale_{cache_key}", {
+            "result": result, "marketTime": result["marketTime"],
+        }, ttl=QUOTE_REVALIDATE_TTL)
+
+
+# Request counts per symbol; the most requested are kept warm in the background
+quote_hits: Counter = Counter()
+HOT_SYMBOL_COUNT = 20
+HOT_REFRESH_INTERVAL = 20  # seconds
+
+
+async def _refresh_quote(symbol: str):
+    cache_key = f"unified_quote_{symbol}"
+    # Leave negatively cached symbols to the backoff in get_quote
+    cached = quote_cache.get(cache_key)
+    if neg_count_cache.get(symbol) or (cached and cached.get("error")):
+        return
+
+    async def _fetch():
+        if is_indian_stock(symbol):
+            result = await _race_nse_yfinance(symbol)
+        else:
+            result = await fetch_yfinance_quote(symbol)
+        if result:
+            _store_quote(cache_key, result)
+        return result
+
+    # Shares the in-flight fetch with a concurrent /api/quote for the same symbol
+    await _coalesced(cache_key, _fetch)
+
+
+async def _hot_symbol_refresher():
+    """Background task: re-fetch the most requested quotes before their cache entries expire."""
+    while True:
+        await asyncio.sleep(HOT_REFRESH_INTERVAL)
+        hot = [sym for sym, _ in quote_hits.most_common(HOT_SYMBOL_COUNT)]
+
+        # Halve counts each pass so the hot set follows recent traffic
+        for sym in list(quote_hits):
+            quote_hits[sym] //= 2
+            if not quote_hits[sym]:
+                del quote_hits[sym]
+
+        if hot:
+            await asyncio.gather(
+                *(_bounded(_yf_batch_sem, _refresh_quote(sym)) for sym in hot),
+                return_exceptions=True,
+            )
+
+
+# How long an expired quote is kept around for revalidation against regularMarketTime
+QUOTE_REVALIDATE_TTL = 6 * 3600
+
+
+async def _quote_unchanged(symbol: str, market_time: int) -> bool:
     """
-    PRIMARY: Fetch real-time quote from yfinance library.
-    Uses history() for reliable price data + info for metadata.
-    Includes rate limiting and retry logic.
+    Cheap check against the chart endpoint's meta: True if Yahoo's
+    regularMarketTime hasn't advanced past the cached quote's.
     """
-    if not YFINANCE_AVAILABLE:
-        print("yfinance not available")
-        return None
+    try:
+        async with yf_slot():
+            chart = await fetch_yahoo_chart(symbol, "1d", "1d")
+    except Exception as e:
+        logger.warning("Quote revalidation failed for %s: %s", symbol, e)
+        return False
+    latest = ((chart or {}).get("meta") or {}).get("regularMarketTime")
+    return latest is not None and latest <= market_time
+
 
+async def _race_nse_yfinance(symbol: str) -> Optional[Dict]:
+    """
+    Start NSE and yfinance lookups together. An NSE result is used if it
+    arrives (or yfinance fails); otherwise whichever source answers wins.
+    """
+    nse_task = asyncio.create_task(fetch_nse_quote(symbol))
+    yf_task = asyncio.create_task(fetch_yfinance_quote(symbol))
     try:
-        loop = asyncio.get_event_loop()
+        done, _ = await asyncio.wait({nse_task, yf_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if nse_task in done:
+            nse_result = nse_task.result()
+            if nse_result:
+                return nse_result
+            return await yf_task
 
-        def _get_yf_data():
-            # Apply rate limiting
-            yf_rate_limiter.wait_if_needed()
+        yf_result = yf_task.result()
+        # NSE is preferred, but don't wait on it when yfinance already has data
+        if yf_result:
+            return yf_result
+        return await nse_task
+    finally:
+        for task in (nse_task, yf_task):
+            if not task.done():
+                task.cancel()
 
-            ticker = yf.Ticker(symbol)
 
-            # Try to get history first (more reliable)
-            hist = None
+async def fetch_yfinance_quote(symbol: str) -> Optional[Dict]:
+    """
+    PRIMARY: Fetch real-time quote from Yahoo Finance.
+    Uses the chart endpoint for reliable price data + yfinance info for metadata.
+    Includes rate limiting and retry logic.
+    """
+    try:
+        rows: List[tuple] = []
+        meta: Dict[str, Any] = {}
+        info: Dict[str, Any] = {}
+
+        async with yf_slot():
+            # Try the short window first, widening if no bars come back
             for period in ["5d", "1mo", "3mo"]:
                 try:
-                    hist = ticker.history(period=period)
-                    if not hist.empty:
+                    chart = await fetch_yahoo_chart(symbol, period, "1d")
+                except aiohttp.ClientResponseError as e:
+                    # fetch_yahoo_chart already retried 429s; don't widen the window
+                    if e.status == 429:
+                        note_yf_rate_limited()
                         break
-                except Exception as e:
-                    if "429" in str(e) or "Too Many Requests" in str(e):
-                        yf_rate_limiter.trigger_backoff(10)
-                        print(f"yfinance rate limited, backing off...")
                     continue
+                if chart:
+                    meta = chart.get("meta") or {}
+                    rows = _chart_rows(chart)
+                    if rows:
+                        break
 
             # Get info separately with error handling
-            info = {}
-            try:
-                info = ticker.info or {}
-            except Exception as e:
-                if "429" in str(e):
-                    yf_rate_limiter.trigger_backoff(10)
-                print(f"yfinance info failed for {symbol}: {e}")
-
-            return hist, info
-
-        hist, info = await asyncio.wait_for(
-            loop.run_in_executor(None, _get_yf_data), timeout=8
-        )
+            if rows and YFINANCE_AVAILABLE:
+                try:
+                    async with async_timeout(8):
+                        info = await get_ticker_info(symbol)
+                except Exception as e:
+                    logger.warning("yfinance info failed for %s: %s", symbol, e)
 
-        if hist.empty:
-            print(f"yfinance: No data for {symbol}")
+        if not rows:
+            logger.info("yfinance: No data for %s", symbol)
             return None
 
         # Get latest price and previous close from history (more reliable)
-        latest = hist.iloc[-1]
-        prev_close = hist.iloc[-2]['Close'] if len(hist) > 1 else latest['Open']
-        current_price = latest['Close']
+        _, latest_open, latest_high, latest_low, current_price, latest_volume = rows[-1]
+        prev_close = rows[-2][4] if len(rows) > 1 else latest_open
 
         change = current_price - prev_close
         change_percent = (change / prev_close * 100) if prev_close != 0 else 0
 
         # Safely extract metadata
-        name = info.get("longName") or info.get("shortName") or symbol.upper()
-
-        # Handle None values safely
-        def safe_float(val, default=0):
-            try:
-                return float(val) if val is not None else default
-            except:
-                return default
-
-        def safe_int(val, default=0):
-            try:
-                return int(val) if val is not None else default
-            except:
-                return default
+        name = (info.get("longName") or info.get("shortName")
+                or meta.get("longName") or meta.get("shortName") or symbol.upper())
 
         result = {
             "symbol": symbol.upper(),
@@ -453,29 +1145,22 @@ async def fetch_yfinance_quote(symbol: str) -> Optional[Dict]:
             "change": float(change),
             "changePercent": float(change_percent),
             "previousClose": float(prev_close),
-            "dayHigh": float(latest['High']),
-            "dayLow": float(latest['Low']),
-            "volume": int(latest['Volume']),
-            "avgVolume": safe_int(info.get("averageDailyVolume10Day") or info.get("averageVolume")),
-            "marketCap": safe_int(info.get("marketCap") or info.get("totalAssets")),
-            "pe": safe_float(info.get("trailingPE") or info.get("forwardPE")),
-            "eps": safe_float(info.get("trailingEps")),
-            "dividend": safe_float(info.get("dividendRate")),
-            "dividendYield": (lambda dy: dy * 100 if dy < 0.20 else dy)(safe_float(info.get("dividendYield", 0))),
-            "yearLow": safe_float(info.get("fiftyTwoWeekLow")),
-            "yearHigh": safe_float(info.get("fiftyTwoWeekHigh")),
-            "exchange": info.get("exchange", "Market"),
-            "currency": info.get("currency", "USD"),
-            "description": info.get("longBusinessSummary", ""),
+            "dayHigh": float(latest_high),
+            "dayLow": float(latest_low),
+            "volume": int(latest_volume),
+            **_map_info(info),
+            "yearLow": safe_float(info.get("fiftyTwoWeekLow") or meta.get("fiftyTwoWeekLow")),
+            "yearHigh": safe_float(info.get("fiftyTwoWeekHigh") or meta.get("fiftyTwoWeekHigh")),
+            "exchange": info.get("exchange") or meta.get("exchangeName") or "Market",
+            "currency": info.get("currency") or meta.get("currency") or "USD",
+            "marketTime": meta.get("regularMarketTime"),
             "source": "yfinance"
         }
 
-        print(f"yfinance quote success for {symbol}: ${current_price:.2f}")
-        sys.stdout.flush()
+        logger.debug("yfinance quote success for %s: $%.2f", symbol, current_price)
         return result
     except Exception as e:
-        print(f"yfinance quote error for {symbol}: {e}")
-        sys.stdout.flush()
+        logger.warning("yfinance quote error for %s: %s", symbol, e)
         return None
 
 
@@ -486,16 +1171,11 @@ async def fetch_yfinance_quote(symbol: str) -> Optional[Dict]:
 # ============================================================================
 async def fetch_yfinance_historical(symbol: str, time_range: str) -> Dict:
     """
-    PRIMARY: Fetch historical data using yfinance.
+    PRIMARY: Fetch historical data from Yahoo Finance's chart endpoint.
     Returns OHLC data for TradingView charts.
     """
-    if not YFINANCE_AVAILABLE:
-        return {"error": "yfinance not available", "data": []}
-
     try:
-        loop = asyncio.get_event_loop()
-
-        # Map time ranges to yfinance parameters
+        # Map time ranges to Yahoo chart parameters
         range_map = {
             '1D': {'period': '1d', 'interval': '5m'},
             '5D': {'period': '5d', 'interval': '15m'},
@@ -507,54 +1187,63 @@ async def fetch_yfinance_historical(symbol: str, time_range: str) -> Dict:
 
         params = range_map.get(time_range, range_map['1M'])
 
-        def _get_history():
-            ticker = yf.Ticker(symbol)
-            return ticker.history(period=params['period'], interval=params['interval'])
+        chart = await fetch_yahoo_chart(symbol, params['period'], params['interval'])
+        chart_data = _chart_points(chart) if chart else []
 
-        hist = await loop.run_in_executor(None, _get_history)
-
-        if hist.empty:
-            print(f"yfinance: No historical data for {symbol}")
+        if not chart_data:
+            logger.info("yfinance: No historical data for %s", symbol)
             return {"error": f"No historical data for {symbol}", "data": []}
 
-        chart_data = []
-        for ts, row in hist.iterrows():
-            chart_data.append({
-                'time': int(ts.timestamp()),
-                'value': float(row['Close']),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-            })
-
-        print(f"yfinance historical for {symbol}: {len(chart_data)} data points")
-        sys.stdout.flush()
+        logger.debug("yfinance historical for %s: %s data points", symbol, len(chart_data))
         return {"data": chart_data, "source": "yfinance"}
 
     except Exception as e:
-        print(f"yfinance historical error for {symbol}: {e}")
-        sys.stdout.flush()
+        logger.warning("yfinance historical error for %s: %s", symbol, e)
         return {"error": str(e), "data": []}
 
 
+# Daily ranges are sliced from one cached 1Y series instead of fetched separately.
+# Intraday (1D/5D) and weekly (MAX) ranges use different intervals and stay separate.
+HISTORICAL_SUPERSET_RANGE = '1Y'
+HISTORICAL_SLICE_DAYS = {'1M': 31, '6M': 183}
+
+
+async def _cached_historical(symbol: str, time_range: str) -> Dict:
+    """Historical data for one range, served from cache or a coalesced fetch."""
+    cache_key = f"historical_{symbol}_{time_range}"
+    cached = historical_cache.get(cache_key)
+    if cached:
+        return cached
+
+    async def _load():
+        # Use yfinance as primary source
+        result = await fetch_yfinance_historical(symbol, time_range)
+
+        if result and result.get("data"):
+            historical_cache.set(cache_key, result, ttl=300)
+
+        return result
+
+    return await _coalesced(cache_key, _load)
+
+
 @app.get("/api/historical")
 async def get_historical(
     symbol: str = Query(..., description="Stock symbol"),
     range: str = Query("1M", description="Time range: 1D, 5D, 1M, 6M, 1Y, MAX")
 ):
     """Get historical price data for charts using yfinance (FREE)"""
-    # Check cache first
-    cache_key = f"historical_{symbol.upper()}_{range}"
-    cached = historical_cache.get(cache_key)
-    if cached:
-        return cached
-
-    # Use yfinance as primary source
-    result = await fetch_yfinance_historical(symbol.upper(), range)
-
-    if result and result.get("data"):
-        historical_cache.set(cache_key, result, ttl=300)
+    symbol_upper = symbol.upper()
+    slice_days = HISTORICAL_SLICE_DAYS.get(range)
+    if slice_days is None:
+        result = await _cached_historical(symbol_upper, range)
+    else:
+        full = await _cached_historical(symbol_upper, HISTORICAL_SUPERSET_RANGE)
+        data = full.get("data")
+        if not data:
+            return full
+        cutoff = data[-1]['time'] - slice_days * 86400
+        result = {**full, "data": [p for p in data if p['time'] >= cutoff]}
 
     return result
 
@@ -575,67 +1264,56 @@ async def search_stocks(query: str = Query(..., description="Search query")):
     results = []
 
     # Strategy 1: Try to validate the query as a ticker symbol
-    if YFINANCE_AVAILABLE:
-        try:
-            loop = asyncio.get_event_loop()
-
-            def _validate_ticker():
-                ticker = yf.Ticker(query.upper())
-                hist = ticker.history(period="5d")
-                if not hist.empty:
-                    # Compute change from last two closing prices (reliable)
-                    current_price = float(hist['Close'].iloc[-1])
-                    prev_close = float(hist['Close'].iloc[-2]) if len(hist) > 1 else current_price
-                    change = current_price - prev_close
-                    change_pct = (change / prev_close * 100) if prev_close != 0 else 0
-
-                    try:
-                        info = ticker.info
-                        return {
-                            "symbol": query.upper(),
-                            "name": info.get("longName") or info.get("shortName") or query.upper(),
-                            "exchange": info.get("exchange", ""),
-                            "country": "USA" if info.get("currency") == "USD" else "",
-                            "price": current_price,
-                            "change": round(change, 2),
-                            "changePercent": round(change_pct, 2),
-                            "currency": info.get("currency", "USD"),
-                        }
-                    except:
-                        return {
-                            "symbol": query.upper(),
-                            "name": query.upper(),
-                            "exchange": "",
-                            "country": "",
-                            "price": current_price,
-                            "change": round(change, 2),
-                            "changePercent": round(change_pct, 2),
-                            "currency": "USD",
-                        }
+    try:
+        async def _validate_ticker():
+            chart = await fetch_yahoo_chart(query.upper(), "5d", "1d")
+            rows = _chart_rows(chart) if chart else []
+            if not rows:
                 return None
 
-            validated = await asyncio.wait_for(
-                loop.run_in_executor(None, _validate_ticker), timeout=5
-            )
-            if validated:
-                results.append(validated)
-                # Cache validated ticker price data for reuse
-                quote_cache.set(f"price_{validated['symbol']}", {
-                    "price": validated["price"],
-                    "change": validated["change"],
-                    "changePercent": validated["changePercent"],
-                }, ttl=30)
-                print(f"yfinance validated ticker: {query.upper()}")
+            # Compute change from last two closing prices (reliable)
+            meta = chart.get("meta") or {}
+            current_price = float(rows[-1][4])
+            prev_close = float(rows[-2][4]) if len(rows) > 1 else current_price
+            change = current_price - prev_close
+            change_pct = (change / prev_close * 100) if prev_close != 0 else 0
+            currency = meta.get("currency") or "USD"
+            return {
+                "symbol": query.upper(),
+                "name": meta.get("longName") or meta.get("shortName") or query.upper(),
+                "exchange": meta.get("exchangeName", ""),
+                "country": "USA" if currency == "USD" else "",
+                "price": current_price,
+                "change": round(change, 2),
+                "changePercent": round(change_pct, 2),
+                "currency": currency,
+            }
 
-        except Exception as e:
-            print(f"yfinance ticker validation failed for {query}: {e}")
+        async with async_timeout(5):
+            validated = await _validate_ticker()
+        if validated:
+            results.append(validated)
+            # Cache validated ticker price data for reuse
+            quote_cache.set(f"price_{validated['symbol']}", {
+                "price": validated["price"],
+                "change": validated["change"],
+                "changePercent": validated["changePercent"],
+            }, ttl=30)
+            logger.debug("yfinance validated ticker: %s", query.upper())
+
+    except Exception as e:
+        logger.debug("yfinance ticker validation failed for %s: %s", query, e)
 
     # Strategy 2: Search local list for partial matches
     local_results = search_local_fallback(query)
+    seen_syms = {r['symbol'] for r in results}
     for stock in local_results:
         # Avoid duplicates
-        if not any(r['symbol'] == stock['symbol'] for r in results):
-            results.append(stock)
+        sym = stock['symbol']
+        if sym in seen_syms:
+            continue
+        results.append(stock)
+        seen_syms.add(sym)
 
     # Limit to 10 results
     results = results[:10]
@@ -647,25 +1325,24 @@ async def search_stocks(query: str = Query(..., description="Search query")):
     ]
     if symbols_needing_prices:
         try:
-            price_data = await asyncio.wait_for(
-                fetch_prices_for_symbols(symbols_needing_prices), timeout=5
-            )
+            async with async_timeout(5):
+                price_data = await fetch_prices_for_symbols(symbols_needing_prices)
             for r in results:
-                if r['symbol'] in price_data:
-                    pd = price_data[r['symbol']]
+                pd = price_data.get(r['symbol'])
+                if pd:
                     r['price'] = pd['price']
                     r['change'] = pd['change']
                     r['changePercent'] = pd['changePercent']
                 r.pop('needsPriceFetch', None)
         except Exception as e:
-            print(f"Price hydration failed: {e}")
+            logger.warning("Price hydration failed: %s", e)
             # Clean up the flag even on failure
             for r in results:
                 r.pop('needsPriceFetch', None)
 
     if results:
         search_cache.set(cache_key, results, ttl=300)
-        print(f"Search for '{query}': {len(results)} results")
+        logger.debug("Search for '%s': %s results", query, len(results))
 
     return results
 
@@ -703,172 +1380,299 @@ COMMON_STOCKS = [
 # Market-specific stocks for movers calculation
 # These are popular stocks that get fetched to calculate gainers/losers/mostActive
 MARKET_MOVERS_STOCKS = {
-    'US': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'NFLX', 'AMD', 'INTC',
-           'JPM', 'V', 'WMT', 'DIS', 'CRM', 'PYPL', 'UBER', 'BA', 'GE', 'KO'],
-    'India': ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS',
+    'US': ('AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'NFLX', 'AMD', 'INTC',
+           'JPM', 'V', 'WMT', 'DIS', 'CRM', 'PYPL', 'UBER', 'BA', 'GE', 'KO'),
+    'India': ('RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS',
               'BHARTIARTL.NS', 'ITC.NS', 'KOTAKBANK.NS', 'LT.NS', 'AXISBANK.NS',
-              'SBIN.NS', 'MARUTI.NS', 'TATAMOTORS.NS', 'SUNPHARMA.NS', 'WIPRO.NS'],
-    'Europe': ['SAP', 'ASML', 'NVO', 'SHEL', 'TTE', 'LVMHF', 'AZN', 'HSBC', 'BTI', 'UL'],
-    'global': ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS'],
+              'SBIN.NS', 'MARUTI.NS', 'TATAMOTORS.NS', 'SUNPHARMA.NS', 'WIPRO.NS'),
+    'Europe': ('SAP', 'ASML', 'NVO', 'SHEL', 'TTE', 'LVMHF', 'AZN', 'HSBC', 'BTI', 'UL'),
+    'global': ('AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS'),
+}
+
+# Market index mapping
+MARKET_INDEX_MAP = {
+    'US': ('^DJI', '^GSPC', '^IXIC', '^RUT', '^VIX'),
+    'India': ('^NSEI', '^BSESN', '^NSEBANK'),
+    'Europe': ('^GDAXI', '^FTSE', '^FCHI', '^IBEX', '^STOXX50E'),
+    'global': ('^GSPC', '^DJI', '^NSEI', '^FTSE'),
+    'futures': ('YM=F', 'ES=F', 'NQ=F', 'GC=F', 'CL=F'),
+    'currencies': (),
+    'crypto': (),
 }
 
-def search_local_fallback(query: str) -> list:
+# Futures symbols per market (markets not listed have none)
+MARKET_FUTURES_MAP = {
+    'global': ('GC=F', 'CL=F'),
+}
+
+# Index name mapping
+INDEX_NAME_MAP = {
+    '^GSPC': 'S&P 500', '^DJI': 'Dow Jones', '^IXIC': 'Nasdaq',
+    '^RUT': 'Russell', '^VIX': 'VIX',
+    '^NSEI': 'NIFTY 50', '^BSESN': 'SENSEX', '^NSEBANK': 'Nifty Bank',
+    '^FTSE': 'FTSE 100', '^GDAXI': 'DAX', '^FCHI': 'CAC 40',
+    '^IBEX': 'IBEX 35', '^STOXX50E': 'STOXX 50',
+    'GC=F': 'Gold', 'CL=F': 'Crude Oil', 'ES=F': 'S&P Futures',
+    'NQ=F': 'Nasdaq Futures', 'YM=F': 'Dow Futures',
+}
+
+def _build_suffix_trie(stocks: list) -> dict:
+    """
+    Trie over every suffix of each stock's casefolded symbol and name.
+    Each node's None key holds the indices of stocks passing through it, so
+    descending by a query string yields all substring matches directly.
+    """
+    root = {None: set()}
+    for idx, stock in enumerate(stocks):
+        root[None].add(idx)
+        for text in (stock['symbol'].casefold(), stock['name'].casefold()):
+            for start in range(len(text)):
+                node = root
+                for ch in text[start:]:
+                    node = node.setdefault(ch, {None: set()})
+                    node[None].add(idx)
+    return root
+
+
+_SYMBOL_TRIE = _build_suffix_trie(COMMON_STOCKS)
+_SYMBOL_INDEX = {stock['symbol'].casefold(): idx for idx, stock in enumerate(COMMON_STOCKS)}
+# Casefolded symbol + name words per stock, for ranking prefix hits ahead of substring hits
+_COMMON_PREFIX_KEYS = tuple(
+    (stock['symbol'].casefold(), *stock['name'].casefold().split()) for stock in COMMON_STOCKS
+)
+
+
+def search_local_fallback(query: str, limit: int = 20) -> list:
     """Local search fallback when API fails"""
-    query = query.lower()
+    query = query.casefold()
     results = []
 
-    for stock in COMMON_STOCKS:
-        if query in stock['symbol'].lower() or query in stock['name'].lower():
-            results.append({
-                "symbol": stock['symbol'],
-                "name": stock['name'],
-                "exchange": stock['exchange'],
-                "country": "USA" if stock['currency'] == "USD" else "India",
-                "price": None,  # Return None instead of 0.0 - frontend handles gracefully
-                "change": None,
-                "changePercent": None,
-                "currency": stock['currency'],
-                "needsPriceFetch": True  # Flag to indicate price needs fetching
-            })
+    node = _SYMBOL_TRIE
+    for ch in query:
+        node = node.get(ch)
+        if node is None:
+            break
+    if node is None:
+        logger.debug("Local fallback found 0 results for '%s'", query)
+        return results
+
+    # Exact symbol hit first, then symbol/name-word prefix hits, then other substring hits
+    exact = _SYMBOL_INDEX.get(query)
+    prefix_hits, substring_hits = [], []
+    for idx in sorted(node[None]):
+        if idx == exact:
+            continue
+        if any(key.startswith(query) for key in _COMMON_PREFIX_KEYS[idx]):
+            prefix_hits.append(idx)
+        else:
+            substring_hits.append(idx)
+    matches = ([exact] if exact is not None else []) + prefix_hits + substring_hits
+
+    for idx in matches[:limit]:
+        stock = COMMON_STOCKS[idx]
+        results.append({
+            "symbol": stock['symbol'],
+            "name": stock['name'],
+            "exchange": stock['exchange'],
+            "country": "USA" if stock['currency'] == "USD" else "India",
+            "price": None,  # Return None instead of 0.0 - frontend handles gracefully
+            "change": None,
+            "changePercent": None,
+            "currency": stock['currency'],
+            "needsPriceFetch": True  # Flag to indicate price needs fetching
+        })
 
-    print(f"Local fallback found {len(results)} results for '{query}'")
+    logger.debug("Local fallback found %s results for '%s'", len(results), query)
     return results
 
 
+MOVERS_TOP_K = 5
+
+
+def _push_top(heap: list, item: tuple, k: int = MOVERS_TOP_K):
+    """Keep the k largest items seen so far in a min-heap."""
+    if len(heap) < k:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+# Cap on concurrent quote lookups issued by one /api/summary request
+SUMMARY_CONCURRENCY = 8
+_SUMMARY_SEM = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+
+# Stale-while-revalidate: summaries are fresh for 60s, then served stale for up
+# to 5 minutes while a single background task rebuilds them
+SUMMARY_FRESH_TTL = 60
+SUMMARY_STALE_TTL = 300
+_summary_refreshing: set = set()
+_summary_refresh_tasks: set = set()  # strong refs so refreshes aren't collected mid-run
+
+
 @app.get("/api/summary")
 async def get_summary(market: str = Query("US", description="Market: US, India, Europe, global")):
     """Get market summary indices using yfinance (FREE)"""
     # Check cache first
     cache_key = f"summary_{market}"
-    cached = quote_cache.get(cache_key)
-    if cached:
-        return cached
+    entry = quote_cache.get(cache_key)
+    # Entries persisted before the stale-while-revalidate format have no payload key
+    if entry and "payload" in entry:
+        if entry.get("fresh_until", 0) <= time.time() and cache_key not in _summary_refreshing:
+            _summary_refreshing.add(cache_key)
+            task = asyncio.create_task(_refresh_summary(market, cache_key))
+            _summary_refresh_tasks.add(task)
+            task.add_done_callback(_summary_refresh_tasks.discard)
+        return entry["payload"]
 
+    return await _coalesced(cache_key, lambda: _build_summary(market))
+
+
+async def _refresh_summary(market: str, cache_key: str):
+    """Background rebuild of a stale summary."""
     try:
-        # Market index mapping
-        market_map = {
-            'US': ['^DJI', '^GSPC', '^IXIC', '^RUT', '^VIX'],
-            'India': ['^NSEI', '^BSESN', '^NSEBANK'],
-            'Europe': ['^GDAXI', '^FTSE', '^FCHI', '^IBEX', '^STOXX50E'],
-            'global': ['^GSPC', '^DJI', '^NSEI', '^FTSE'],
-            'futures': ['YM=F', 'ES=F', 'NQ=F', 'GC=F', 'CL=F'],
-            'currencies': [],
-            'crypto': [],
-        }
+        await _coalesced(cache_key, lambda: _build_summary(market))
+    except Exception as e:
+        logger.warning("Summary refresh failed for %s: %s", market, e)
+    finally:
+        _summary_refreshing.discard(cache_key)
 
-        # Futures symbols per market
-        market_futures = {
-            'US': [],
-            'India': [],
-            'Europe': [],
-            'global': ['GC=F', 'CL=F'],
-            'futures': [],
-            'currencies': [],
-            'crypto': [],
-        }
 
-        futures_symbols = market_futures.get(market, [])
-        indices_symbols = market_map.get(market, market_map['US'])
-        indices = []
-        futures = []
-
-        # Index name mapping
-        name_map = {
-            '^GSPC': 'S&P 500', '^DJI': 'Dow Jones', '^IXIC': 'Nasdaq',
-            '^RUT': 'Russell', '^VIX': 'VIX',
-            '^NSEI': 'NIFTY 50', '^BSESN': 'SENSEX', '^NSEBANK': 'Nifty Bank',
-            '^FTSE': 'FTSE 100', '^GDAXI': 'DAX', '^FCHI': 'CAC 40',
-            '^IBEX': 'IBEX 35', '^STOXX50E': 'STOXX 50',
-            'GC=F': 'Gold', 'CL=F': 'Crude Oil', 'ES=F': 'S&P Futures',
-            'NQ=F': 'Nasdaq Futures', 'YM=F': 'Dow Futures',
-        }
+# get_quote tasks shielded from a cancelled summary build, kept referenced until done
+_shielded_quotes: set = set()
+
+
+async def _shielded_quote(symbol: str) -> Dict:
+    """
+    get_quote that keeps running if the caller is cancelled: a _coalesced
+    owner cancelling would cancel the shared future under concurrent
+    /api/quote requests for the same symbol.
+    """
+    task = asyncio.ensure_future(get_quote(symbol))
+    _shielded_quotes.add(task)
+    task.add_done_callback(_shielded_quotes.discard)
+    return await asyncio.shield(task)
+
+
+async def _build_summary(market: str) -> Dict:
+    """Fetch indices, futures and movers for a market and cache the summary."""
+    cache_key = f"summary_{market}"
+    try:
+        futures_symbols = MARKET_FUTURES_MAP.get(market, ())
+        indices_symbols = MARKET_INDEX_MAP.get(market, MARKET_INDEX_MAP['US'])
+
+        # One bounded get_quote task per symbol, shared by index and mover lookups
+        quote_tasks: Dict[str, asyncio.Task] = {}
+
+        def get_quote_coalesced(symbol: str) -> asyncio.Task:
+            task = quote_tasks.get(symbol)
+            if task is None:
+                task = quote_tasks[symbol] = asyncio.ensure_future(
+                    _bounded(_SUMMARY_SEM, _shielded_quote(symbol))
+                )
+            return task
 
         # Fetch index quotes using get_quote (which uses yfinance)
-        async def fetch_index_quote(symbol: str, quote_type: str):
+        async def fetch_index_quote(symbol: str):
             try:
-                quote_result = await get_quote(symbol)
+                quote_result = await get_quote_coalesced(symbol)
                 if quote_result and not quote_result.get("error"):
                     return {
-                        "type": quote_type,
                         "symbol": symbol,
-                        "name": name_map.get(symbol, quote_result.get("name") or symbol),
+                        "name": INDEX_NAME_MAP.get(symbol, quote_result.get("name") or symbol),
                         "price": float(quote_result.get("price", 0)),
                         "change": float(quote_result.get("change", 0)),
                         "changePercent": float(quote_result.get("changePercent", 0)),
                     }
             except Exception as e:
-                print(f"Failed to fetch {symbol}: {e}")
+                logger.warning("Failed to fetch %s: %s", symbol, e)
             return None
 
-        # Fetch all indices and futures in parallel
-        tasks = []
-        for symbol in indices_symbols:
-            tasks.append(fetch_index_quote(symbol, "index"))
-        for symbol in futures_symbols:
-            tasks.append(fetch_index_quote(symbol, "future"))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def fetch_mover_quote(symbol: str, quote_result: Optional[Dict]):
+            try:
+                # Batch misses fall back to a single-symbol quote
+                if quote_result is None:
+                    quote_result = await get_quote_coalesced(symbol)
+                if not quote_result or quote_result.get("error"):
+                    return None
+
+                # Normalize once; rows with no price, or no volume and no move,
+                # can't rank in any mover list, so drop them here
+                price = float(quote_result.get("price") or 0)
+                change_pct = float(quote_result.get("changePercent") or 0)
+                volume = int(quote_result.get("volume") or 0)
+                if not price or (not volume and not change_pct):
+                    return None
+
+                name = quote_result.get("name")
+                if not name:
+                    # Batch rows carry no name; info is cached for a day
+                    try:
+                        info = await _bounded(_SUMMARY_SEM, get_ticker_info(symbol))
+                    except Exception:
+                        info = {}
+                    name = info.get("longName") or info.get("shortName") or symbol
+                return {
+                    "symbol": symbol,
+                    "name": name,
+                    "price": price,
+                    "change": float(quote_result.get("change") or 0),
+                    "changePercent": change_pct,
+                    "volume": volume,
+                }
+            except Exception as e:
+                logger.warning("Failed to fetch mover %s: %s", symbol, e)
+            return None
 
-        # Process results
-        num_indices = len(indices_symbols)
-        for result in results[:num_indices]:
-            if result and not isinstance(result, Exception) and result.get("type") == "index":
-                del result["type"]
-                indices.append(result)
+        # Fetch all indices, futures and movers in parallel
+        movers_symbols = MARKET_MOVERS_STOCKS.get(market, MARKET_MOVERS_STOCKS['US'])
 
-        for result in results[num_indices:]:
-            if result and not isinstance(result, Exception) and result.get("type") == "future":
-                del result["type"]
-                futures.append(result)
+        async def fetch_movers():
+            try:
+                batch = await get_quotes_batch(movers_symbols)
+            except Exception as e:
+                logger.warning("Mover batch fetch failed: %s", e)
+                batch = {}
+            return await run_task_group(
+                *(fetch_mover_quote(sym, batch.get(sym)) for sym in movers_symbols)
+            )
 
-        # Calculate movers from predefined stocks
-        movers_symbols = MARKET_MOVERS_STOCKS.get(market, MARKET_MOVERS_STOCKS.get('US', []))
-        movers_data = []
+        # The fetch helpers return None on failure, so one bad symbol never
+        # aborts the group; cancelling the request drops lookups still queued
+        # on the semaphore, while started quotes finish (and cache) in the background
+        try:
+            index_results, future_results, mover_results = await run_task_group(
+                run_task_group(*(fetch_index_quote(sym) for sym in indices_symbols)),
+                run_task_group(*(fetch_index_quote(sym) for sym in futures_symbols)),
+                fetch_movers(),
+            )
+        finally:
+            for task in quote_tasks.values():
+                if not task.done():
+                    task.cancel()
 
-        if movers_symbols:
-            async def fetch_mover_quote(symbol: str):
-                try:
-                    quote_result = await get_quote(symbol)
-                    if quote_result and not quote_result.get("error") and quote_result.get("price"):
-                        return {
-                            "symbol": symbol,
-                            "name": quote_result.get("name", symbol),
-                            "price": float(quote_result.get("price", 0)),
-                            "change": float(quote_result.get("change", 0)),
-                            "changePercent": float(quote_result.get("changePercent", 0)),
-                            "volume": int(quote_result.get("volume", 0)),
-                        }
-                except Exception as e:
-                    print(f"Failed to fetch mover {symbol}: {e}")
-                return None
+        # Process results
+        indices = [r for r in index_results if r]
+        futures = [r for r in future_results if r]
 
-            # Fetch all mover quotes in parallel
-            mover_tasks = [fetch_mover_quote(sym) for sym in movers_symbols]
-            mover_results = await asyncio.gather(*mover_tasks, return_exceptions=True)
-
-            for mover in mover_results:
-                if mover and not isinstance(mover, Exception):
-                    movers_data.append(mover)
-
-        # Sort for gainers (highest changePercent)
-        gainers = sorted(
-            [m for m in movers_data if m.get('changePercent', 0) > 0],
-            key=lambda x: x.get('changePercent', 0),
-            reverse=True
-        )[:5]
-
-        # Sort for losers (lowest changePercent)
-        losers = sorted(
-            [m for m in movers_data if m.get('changePercent', 0) < 0],
-            key=lambda x: x.get('changePercent', 0)
-        )[:5]
-
-        # Sort for most active (highest volume)
-        most_active = sorted(
-            movers_data,
-            key=lambda x: x.get('volume', 0),
-            reverse=True
-        )[:5]
+        # Calculate movers from predefined stocks
+        movers_data = [m for m in mover_results if m]
+
+        # Single pass keeping three size-5 min-heaps: gainers (highest changePercent),
+        # losers (lowest changePercent) and most active (highest volume).
+        # -i breaks ties in favour of earlier movers and keeps dicts out of comparisons.
+        gainers_h, losers_h, active_h = [], [], []
+        for i, m in enumerate(movers_data):
+            pct = m.get('changePercent') or 0
+            if pct > 0:
+                _push_top(gainers_h, (pct, -i, m))
+            elif pct < 0:
+                _push_top(losers_h, (-pct, -i, m))
+            _push_top(active_h, (m.get('volume') or 0, -i, m))
+
+        gainers = [t[2] for t in sorted(gainers_h, reverse=True)]
+        losers = [t[2] for t in sorted(losers_h, reverse=True)]
+        most_active = [t[2] for t in sorted(active_h, reverse=True)]
 
         result = {
             "indices": indices,
@@ -878,8 +1682,9 @@ async def get_summary(market: str = Query("US", description="Market: US, India,
             "losers": losers,
         }
 
-        # Cache for 60 seconds
-        quote_cache.set(cache_key, result, ttl=60)
+        quote_cache.set(cache_key, {
+            "payload": result, "fresh_until": time.time() + SUMMARY_FRESH_TTL,
+        }, ttl=SUMMARY_STALE_TTL)
         return result
 
     except Exception as e:
@@ -927,13 +1732,19 @@ async def get_wikipedia(query: str = Query(..., description="Wikipedia search qu
     except Exception as e:
         return {"error": str(e), "summary": "", "fullText": ""}
 
+# Outermost {...} in a Gemini reply, ignoring any markdown fences around it
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+@disk_cached("gemini", ttl_days=30, should_cache=lambda r: bool(r.get("sectors")))
 async def fetch_gemini_classification(symbol: str, description: str) -> Dict:
     """Use Gemini to classify company into sectors and suggest competitors"""
-    if not GEMINI_AVAILABLE or not GEMINI_API_KEY:
+    model = _GEMINI_MODEL
+    if model is None:
         return {"sectors": [], "top_3_overall": []}
 
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
+        excerpt = description[:2500]
         prompt = f"""
         Given the following company description for {symbol}, identify 3 to 5 DISTINCT business sectors
         it operates in and suggest 3 direct competitors for each sector.
@@ -962,28 +1773,126 @@ async def fetch_gemini_classification(symbol: str, description: str) -> Dict:
         }}
         Return ONLY the JSON. No preamble, no markdown blocks.
 
-        Description: {description[:2500]}
+        Description: {excerpt}
         """
 
         response = await asyncio.get_event_loop().run_in_executor(
-            None, 
+            _GEMINI_POOL,
             lambda: model.generate_content(prompt)
         )
         
-        import json
-        text = response.text.strip()
+        text = response.text
         # Handle cases where LLM might still wrap in markdown
-        if "```" in text:
-            import re
-            match = re.search(r'(\{.*\})', text.replace('\n', ' '), re.DOTALL)
-            if match:
-                text = match.group(1)
+        match = _JSON_BLOCK_RE.search(text)
+        if match:
+            text = match.group(0)
         
-        return json.loads(text.strip())
+        return orjson.loads(text)
     except Exception as e:
-        print(f"Gemini error for {symbol}: {e}")
+        logger.warning("Gemini error for %s: %s", symbol, e)
         return {"sectors": [], "top_3_overall": []}
 
+# Successful Gemini classifications per symbol, kept in process for a day
+classification_cache = PriceCache(default_ttl=86400, max_size=512)
+
+
+async def classify_company(symbol: str, description: str) -> Dict:
+    """
+    Sector/competitor classification for symbol, memoized for a day.
+    Concurrent calls for one symbol share a single Gemini request; empty
+    (failed) classifications are returned but not memoized.
+    """
+    cached = classification_cache.get(symbol)
+    if cached:
+        return cached
+
+    async def _fetch():
+        result = await fetch_gemini_classification(symbol, description)
+        if result.get("sectors"):
+            classification_cache.set(symbol, result)
+        return result
+
+    result = await _coalesced(f"classify_{symbol}", _fetch)
+    return result if result.get("sectors") else {"sectors": [], "top_3_overall": []}
+
+WIKI_REST_SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/{title}"
+WIKI_ACTION_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKI_HEADERS = {"User-Agent": "StockMind/1.0 (educational stock research app)"}
+WIKI_SEARCH_CANDIDATES = 5  # search hits tried in order when earlier ones are disambiguation pages
+
+
+# Last fetched page + ETag per title, for If-None-Match revalidation
+wiki_etag_cache = make_cache("wiki_etag", default_ttl=90 * 86400)
+
+
+async def _wiki_page(title: str) -> Optional[Dict]:
+    """
+    Fetch a Wikipedia article by title over the shared client: summary, URL and
+    canonical title from the REST summary endpoint, plain-text body from the
+    action API. Returns None for missing or disambiguation pages.
+
+    A previously fetched page is revalidated with If-None-Match; on 304 the
+    stored page is returned without downloading the article again.
+    """
+    http = app.state.http
+    summary_url = WIKI_REST_SUMMARY_URL.format(title=url_quote(title.replace(" ", "_"), safe=""))
+    stored = wiki_etag_cache.get(title)
+
+    def _extract_req():
+        return http.get(WIKI_ACTION_API_URL, headers=WIKI_HEADERS, params={
+            "action": "query", "prop": "extracts", "explaintext": 1,
+            "redirects": 1, "titles": title, "format": "json",
+        })
+
+    if stored:
+        summary_resp = await http.get(
+            summary_url, follow_redirects=True,
+            headers={**WIKI_HEADERS, "If-None-Match": stored["etag"]},
+        )
+        if summary_resp.status_code == 304:
+            return stored["page"]
+        extract_resp = await _extract_req() if summary_resp.status_code == 200 else None
+    else:
+        summary_resp, extract_resp = await asyncio.gather(
+            http.get(summary_url, headers=WIKI_HEADERS, follow_redirects=True),
+            _extract_req(),
+        )
+
+    if summary_resp.status_code != 200:
+        return None
+    summary = summary_resp.json()
+    if summary.get("type") == "disambiguation":
+        return None
+
+    full_text = ""
+    if extract_resp is not None and extract_resp.status_code == 200:
+        pages = (extract_resp.json().get("query") or {}).get("pages") or {}
+        full_text = next((p.get("extract", "") for p in pages.values()), "")
+
+    page = {
+        "summary": summary.get("extract", ""),
+        "fullText": full_text or summary.get("extract", ""),
+        "url": ((summary.get("content_urls") or {}).get("desktop") or {}).get("page", ""),
+        "title": summary.get("title", title),
+    }
+    etag = summary_resp.headers.get("ETag")
+    if etag:
+        wiki_etag_cache.set(title, {"etag": etag, "page": page})
+    return page
+
+
+async def _wiki_search(term: str) -> List[str]:
+    """Titles of the top WIKI_SEARCH_CANDIDATES Wikipedia search hits for term."""
+    resp = await app.state.http.get(WIKI_ACTION_API_URL, headers=WIKI_HEADERS, params={
+        "action": "query", "list": "search", "srsearch": term,
+        "srlimit": WIKI_SEARCH_CANDIDATES, "format": "json",
+    })
+    resp.raise_for_status()
+    hits = (resp.json().get("query") or {}).get("search") or []
+    return [hit["title"] for hit in hits]
+
+
+@disk_cached("wiki", ttl_days=30, should_cache=lambda r: not r.get("error"))
 async def get_wikipedia_summary(symbol: str) -> Dict:
     """Get company description from Wikipedia with resilient fallback to name search"""
     try:
@@ -992,39 +1901,36 @@ async def get_wikipedia_summary(symbol: str) -> Dict:
         search_term = symbol_clean
         if ".NS" in search_term: search_term = search_term.replace(".NS", "")
         if ".BO" in search_term: search_term = search_term.replace(".BO", "")
-        
-        loop = asyncio.get_event_loop()
-        
+
         # 1. Try exact symbol search first
-        try:
-            page = await loop.run_in_executor(None, lambda: wikipedia.page(search_term, auto_suggest=False))
-        except:
-            # 2. If symbol fails, search for company name if we can get it
-            name_to_search = search_term
-            try:
-                ticker = yf.Ticker(symbol_clean)
-                info = ticker.info
-                name_to_search = info.get("longName") or info.get("shortName") or search_term
-                # Remove common legal suffixes for better wiki matching
-                name_to_search = name_to_search.split(" Inc.")[0].split(" Ltd.")[0].split(" Corp.")[0]
-            except:
-                pass
-            
-            try:
-                search_results = await loop.run_in_executor(None, lambda: wikipedia.search(name_to_search))
-                if search_results:
-                    page = await loop.run_in_executor(None, lambda: wikipedia.page(search_results[0], auto_suggest=False))
-                else:
-                    return {"error": "Page not found", "summary": "", "fullText": ""}
-            except:
-                return {"error": "Page not found", "summary": "", "fullText": ""}
+        page = await _wiki_page(search_term)
+        if page:
+            return page
 
-        return {
-            "summary": page.summary,
-            "fullText": page.content,
-            "url": page.url,
-            "title": page.title
-        }
+        # 2. If symbol fails, search for company name if we can get it
+        name_to_search = search_term
+        try:
+            # The chart endpoint's meta carries the name without the full info payload
+            chart = await fetch_yahoo_chart(symbol_clean, "1d", "1d")
+            meta = (chart or {}).get("meta") or {}
+            name_to_search = meta.get("longName") or meta.get("shortName") or search_term
+            # Remove common legal suffixes for better wiki matching
+            name_to_search = name_to_search.split(" Inc.")[0].split(" Ltd.")[0].split(" Corp.")[0]
+        except Exception:
+            pass
+
+        # A disambiguation top hit falls through to the next one
+        page = None
+        try:
+            for title in await _wiki_search(name_to_search):
+                page = await _wiki_page(title)
+                if page:
+                    break
+        except Exception:
+            page = None
+        if not page:
+            return {"error": "Page not found", "summary": "", "fullText": ""}
+        return page
     except Exception as e:
         return {"error": str(e), "summary": "", "fullText": ""}
 
@@ -1033,6 +1939,13 @@ async def get_wikipedia(query: str = Query(..., description="Wikipedia search qu
     """Get Wikipedia page summary and content"""
     return await get_wikipedia_summary(query)
 
+# Short-lived negative entries so repeated polls for a symbol with no
+# description (or during a Gemini outage) skip Wikipedia and Gemini entirely
+COMPETITORS_NEGATIVE = {"peerCompetitors": [], "topCompetitors": [], "_negative": True}
+COMPETITORS_NO_DESCRIPTION_TTL = 600
+COMPETITORS_GEMINI_FAILURE_TTL = 300
+
+
 @app.get("/api/competitors")
 async def get_competitors(symbol: str = Query(..., description="Stock symbol")):
     """Get peer competitors using Wikipedia + Gemini"""
@@ -1040,6 +1953,8 @@ async def get_competitors(symbol: str = Query(..., description="Stock symbol")):
     cache_key = f"competitors_{symbol_upper}"
     cached = search_cache.get(cache_key)
     if cached:
+        if cached.get("_negative"):
+            return {"peerCompetitors": [], "topCompetitors": []}
         return cached
 
     try:
@@ -1050,16 +1965,20 @@ async def get_competitors(symbol: str = Query(..., description="Stock symbol")):
         # If Wikipedia fails specifically for this ticker, try symbol name
         if not description:
             try:
-                ticker = yf.Ticker(symbol_upper)
-                description = ticker.info.get("longBusinessSummary", "")
+                info = await get_ticker_info(symbol_upper)
+                description = info.get("longBusinessSummary", "")
             except:
                 pass
 
         if not description:
+            search_cache.set(cache_key, dict(COMPETITORS_NEGATIVE), ttl=COMPETITORS_NO_DESCRIPTION_TTL)
             return {"peerCompetitors": [], "topCompetitors": []}
 
         # 2. Get classification from Gemini
-        classification = await fetch_gemini_classification(symbol_upper, description)
+        classification = await classify_company(symbol_upper, description)
+        if not classification.get("sectors"):
+            search_cache.set(cache_key, dict(COMPETITORS_NEGATIVE), ttl=COMPETITORS_GEMINI_FAILURE_TTL)
+            return {"peerCompetitors": [], "topCompetitors": []}
         
         # 3. Resolve top 3 competitors to get prices (Parallelize for speed)
         top_suggested = classification.get("top_3_overall", [])
@@ -1103,43 +2022,96 @@ async def get_competitors(symbol: str = Query(..., description="Stock symbol")):
         return result
 
     except Exception as e:
-        print(f"Competitor API error: {e}")
+        logger.warning("Competitor API error: %s", e)
         return {"error": str(e), "peerCompetitors": [], "topCompetitors": []}
 
+@app.post("/api/competitors/cache/clear")
+async def clear_competitors_cache():
+    """Drop memoized Gemini classifications so the next lookup re-asks the model"""
+    classification_cache.clear()
+    return {"success": True}
+
 
 # ============================================================================
 # DATABASE STARTUP
 # ============================================================================
+DAILY_SCORE_OFFSET = 5 * 60  # run at 00:05 UTC
+DAILY_SCORE_RECHECK = 3600  # max single sleep before re-reading the clock
+
+
 async def _daily_score_scheduler():
     """Background task: compute daily scores once per day at ~00:05 UTC."""
     # Wait for DB initialization
     await asyncio.sleep(10)
-    print("Daily evaluation scheduler started.")
+    logger.info("Daily evaluation scheduler started.")
 
     while True:
         try:
             await _compute_daily_scores_internal()
-            print(f"Daily scores computed at {datetime.utcnow().isoformat()}")
+            logger.info("Daily scores computed at %s", datetime.utcnow().isoformat())
         except Exception as e:
-            print(f"Daily score scheduler error: {e}")
+            logger.error("Daily score scheduler error: %s", e)
 
-        # Sleep until next day 00:05 UTC
-        now = datetime.utcnow()
-        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=5, second=0, microsecond=0)
-        sleep_seconds = (tomorrow - now).total_seconds()
-        await asyncio.sleep(sleep_seconds)
+        # Sleep until next day 00:05 UTC. The deadline is an epoch timestamp
+        # re-checked at least hourly, so wall-clock jumps can't skew it by more.
+        next_run = (int(time.time()) // 86400 + 1) * 86400 + DAILY_SCORE_OFFSET
+        while (remaining := next_run - time.time()) > 0:
+            await asyncio.sleep(min(remaining, DAILY_SCORE_RECHECK))
+
+
+_background_tasks: set = set()  # strong refs so startup loops aren't collected mid-run
+
+
+def _background_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
+
+
+def _start_background(coro) -> asyncio.Task:
+    """Run coro as a long-lived task, held until it finishes and logged if it raises."""
+    task = asyncio.create_task(coro, name=coro.__name__)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_done)
+    return task
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize SQLite database on server start."""
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
     await init_db()
     print("SQLite database initialized and ready.")
     # Clear stale sentiment cache on startup so new fallback logic takes effect
-    from database import clear_sentiment_cache
     await clear_sentiment_cache()
     print("Stale sentiment cache cleared — fresh fetches will use Google News RSS fallback.")
-    asyncio.create_task(_daily_score_scheduler())
+    _start_background(_daily_score_scheduler())
+    _start_background(_cache_sweeper())
+    _start_background(_hot_symbol_refresher())
+    _start_background(init_semantic_cache())
+    get_http_session()
+    # Pooled keep-alive client for non-Yahoo outbound calls (news, Wikipedia)
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(10.0, connect=3.0),
+    )
+    set_http_client(app.state.http)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared HTTP, Redis and database connections."""
+    if AIOHTTP_SESSION is not None and not AIOHTTP_SESSION.closed:
+        await AIOHTTP_SESSION.close()
+    http = getattr(app.state, "http", None)
+    if http is not None:
+        await http.aclose()
+    await close_redis()
+    await close_db()
 
 
 # ============================================================================
@@ -1206,7 +2178,7 @@ async def db_execute_trade(trade: TradeRequest):
         raise HTTPException(status_code=400, detail="Invalid quantity")
 
     portfolio = await get_portfolio()
-    holdings = await get_holdings()
+    existing = await get_holding(trade.symbol, trade.type)
 
     if trade.action == "buy":
         if total > portfolio["balance"]:
@@ -1214,9 +2186,6 @@ async def db_execute_trade(trade: TradeRequest):
 
         new_balance = portfolio["balance"] - total
 
-        # Check if holding exists
-        existing = next((h for h in holdings if h["symbol"] == trade.symbol and h["type"] == trade.type), None)
-
         if existing:
             new_qty = existing["quantity"] + trade.quantity
             new_avg = (existing["quantity"] * existing["averagePrice"] + trade.quantity * trade.price) / new_qty
@@ -1227,8 +2196,6 @@ async def db_execute_trade(trade: TradeRequest):
         await save_portfolio(new_balance)
 
     elif trade.action == "sell":
-        existing = next((h for h in holdings if h["symbol"] == trade.symbol and h["type"] == trade.type), None)
-
         if not existing:
             raise HTTPException(status_code=400, detail="You do not own this asset")
         if existing["quantity"] < trade.quantity:
@@ -1247,7 +2214,7 @@ async def db_execute_trade(trade: TradeRequest):
         raise HTTPException(status_code=400, detail="Invalid action. Must be 'buy' or 'sell'.")
 
     # Record transaction
-    tx_id = f"{int(datetime.now().timestamp() * 1000)}-{uuid.uuid4().hex[:8]}"
+    tx_id = new_id()
     timestamp = datetime.utcnow().isoformat()
     await add_transaction(tx_id, trade.symbol, trade.name, trade.type, trade.action,
                           trade.quantity, trade.price, total, timestamp)
@@ -1272,7 +2239,7 @@ async def db_get_alerts():
 @app.post("/api/db/alerts")
 async def db_create_alert(alert: AlertRequest):
     """Create a new alert."""
-    alert_id = f"{int(datetime.now().timestamp() * 1000)}-{uuid.uuid4().hex[:8]}"
+    alert_id = new_id()
     created_at = datetime.utcnow().isoformat()
     await add_alert(alert_id, alert.symbol, alert.name, alert.type,
                     alert.targetPrice, alert.condition, created_at)
@@ -1335,7 +2302,7 @@ class ChecklistRequest(BaseModel):
 @app.post("/api/db/checklists")
 async def db_create_checklist(req: ChecklistRequest):
     """Save a trade checklist entry."""
-    checklist_id = f"cl-{int(datetime.now().timestamp() * 1000)}-{uuid.uuid4().hex[:8]}"
+    checklist_id = new_id("cl-")
     created_at = datetime.utcnow().isoformat()
     await add_checklist(
         checklist_id, req.transactionId, req.symbol, req.type, req.action,
@@ -1367,18 +2334,34 @@ async def db_get_checklist_stats(days: int = Query(30)):
 # MENTOR
 # ============================================================================
 
+# Gemini feedback is content-addressed (the key covers the whole prompt), so
+# it can live long; report summaries describe live state and expire sooner
+# while markets are open.
+MENTOR_FEEDBACK_TTL = 30 * 86400
+REPORT_SUMMARY_TTL_MARKET = 15 * 60
+REPORT_SUMMARY_TTL_CLOSED = 86400
+MARKET_HOURS_UTC = (dt_time(3, 45), dt_time(20, 0))  # NSE open through NYSE close
+
+
+def _report_summary_ttl(now: datetime) -> int:
+    """Short TTL on weekdays while NSE or NYSE is trading, a day otherwise."""
+    start, end = MARKET_HOURS_UTC
+    if now.weekday() < 5 and start <= now.time() < end:
+        return REPORT_SUMMARY_TTL_MARKET
+    return REPORT_SUMMARY_TTL_CLOSED
+
+
 @app.get("/api/mentor/analyze")
-async def mentor_analyze():
+async def mentor_analyze(background_tasks: BackgroundTasks):
     """Run all mentor pattern checks on current portfolio state."""
-    transactions = await get_transactions()
-    holdings = await get_holdings()
-    portfolio = await get_portfolio()
+    transactions, holdings, portfolio, trigger_history = await asyncio.gather(
+        get_transactions(), get_holdings(), get_portfolio(), get_mentor_triggers_raw(30),
+    )
     balance = portfolio.get("balance", 0)
 
     alerts = await run_all_checks(transactions, holdings, balance)
 
     # Enrich alerts with escalation history
-    trigger_history = await get_mentor_triggers_raw(30)
     enriched_alerts, improvement_notes = enrich_alerts_with_history(alerts, trigger_history)
 
     # Build history context for Gemini
@@ -1405,10 +2388,11 @@ async def mentor_analyze():
             traded_symbols.add(a['symbol'])
 
     if traded_symbols:
-        from database import get_cached_sentiment
         sentiment_lines = []
-        for sym in list(traded_symbols)[:5]:  # Limit to 5 symbols
-            cached = await get_cached_sentiment(sym)
+        syms = list(traded_symbols)[:5]  # Limit to 5 symbols
+        cached_map = await get_cached_sentiment_batch(syms)
+        for sym in syms:
+            cached = cached_map.get(sym)
             if cached and cached.get('mood') != 'neutral':
                 sentiment_lines.append(
                     f"- {sym}: mood={cached['mood']}, {cached.get('summary', '')}"
@@ -1416,22 +2400,40 @@ async def mentor_analyze():
         if sentiment_lines:
             sentiment_context = "\n".join(sentiment_lines)
 
-    # Get Gemini feedback for all alerts
-    gemini_feedback = await get_gemini_mentor_feedback(enriched_alerts, history_context, sentiment_context)
+    # Get Gemini feedback for all alerts, shared across identical prompts.
+    # The prompt carries each alert's message and its live numbers, so
+    # hashing it keeps a 3% loss from being answered with 18% loss advice.
+    mentor_prompt = build_mentor_prompt(enriched_alerts, history_context, sentiment_context)
+    feedback_key = content_key("gemini:mentor", {"model": MENTOR_MODEL_NAME, "prompt": mentor_prompt})
+    # "+"-joined: a comma is the RediSearch tag separator and would split the value
+    pattern_set = "+".join(sorted({a["pattern_type"] for a in enriched_alerts}))
+    severities = "+".join(sorted({f'{a["pattern_type"]}:{a["severity"]}' for a in enriched_alerts}))
+    # "none" rather than empty, since empty tags are left out of the filter
+    symbols = "+".join(sorted({a["symbol"] for a in enriched_alerts if a.get("symbol")})) or "none"
+    gemini_feedback = await cached_call(
+        feedback_key, MENTOR_FEEDBACK_TTL,
+        lambda: semantic_call(
+            mentor_prompt,
+            {"kind": "mentor", "pattern_set": pattern_set, "severity": severities, "symbol": symbols},
+            lambda: get_gemini_mentor_feedback(enriched_alerts, history_context, sentiment_context),
+        ),
+    )
 
-    # Save triggers to DB and attach feedback
+    # Attach feedback, then save all triggers to DB in one batch
     saved_alerts = []
-    for alert in enriched_alerts:
-        trigger_id = f"mt-{int(datetime.now().timestamp() * 1000)}-{uuid.uuid4().hex[:8]}"
+    trigger_rows = []
+    trigger_ids = new_ids("mt-", len(enriched_alerts))
+    created_at = datetime.utcnow().isoformat()
+    for trigger_id, alert in zip(trigger_ids, enriched_alerts):
         feedback = None
         if gemini_feedback and isinstance(gemini_feedback, dict):
             feedback = gemini_feedback.get(alert.get("pattern_type", ""), None)
 
-        await add_mentor_trigger(
+        trigger_rows.append((
             trigger_id, alert["pattern_type"], alert["severity"],
             alert.get("symbol"), alert["message"], feedback,
-            datetime.utcnow().isoformat(),
-        )
+            created_at,
+        ))
         saved_alerts.append({
             "id": trigger_id,
             "patternType": alert["pattern_type"],
@@ -1440,12 +2442,15 @@ async def mentor_analyze():
             "message": alert["message"],
             "geminiFeedback": feedback,
             "dismissed": False,
-            "createdAt": datetime.utcnow().isoformat(),
+            "createdAt": created_at,
             "escalationLevel": alert.get("escalation_level"),
             "priorCount": alert.get("prior_count", 0),
             "escalationNote": alert.get("escalation_note"),
         })
 
+    # Ids are assigned up front, so the insert can finish after the response
+    background_tasks.add_task(add_mentor_triggers_bulk, trigger_rows)
+
     return {"alerts": saved_alerts, "improvementNotes": improvement_notes}
 
 
@@ -1470,26 +2475,22 @@ async def mentor_history(limit: int = Query(50)):
 @app.get("/api/evaluation/scores")
 async def evaluation_get_scores():
     """Get current 30-day rolling scores."""
-    latest = await get_latest_daily_score()
+    latest, daily = await asyncio.gather(get_latest_daily_score(), get_daily_scores(30))
     if not latest:
         return {"scores": None, "eligible": False}
 
     # Check eligibility from daily scores
-    daily = await get_daily_scores(30)
     trade_count = sum(d.get("trade_count", 0) for d in daily)
     active_days = sum(1 for d in daily if d.get("active_day", False))
 
-    from scoring_engine import check_eligibility, compute_data_sufficiency
-
     eligible = check_eligibility(trade_count, active_days)
 
     # Compute data sufficiency at read time
-    holdings = await get_holdings()
-    checklists = await get_checklists_raw(30)
-    transactions = await get_transactions()
     cutoff = (datetime.utcnow() - timedelta(days=30)).isoformat()
-    recent_txns = [t for t in transactions if t.get("timestamp", "") >= cutoff]
-    mentor_triggers = await get_mentor_triggers_raw(30)
+    holdings, checklists, recent_txns, mentor_triggers = await asyncio.gather(
+        get_holdings(), get_checklists_raw(30), get_transactions_since(cutoff),
+        get_mentor_triggers_raw(30),
+    )
 
     insufficient_data = compute_data_sufficiency(
         holdings, checklists, recent_txns, mentor_triggers,
@@ -1512,19 +2513,19 @@ async def evaluation_get_scores():
 
 async def _compute_daily_scores_internal() -> Dict:
     """Internal: compute and persist daily scores + badges. Idempotent per date."""
-    today = datetime.utcnow().date().isoformat()
-
-    # Gather data
-    transactions = await get_transactions()
-    holdings = await get_holdings()
-    portfolio = await get_portfolio()
-    checklists = await get_checklists_raw(30)
-    mentor_triggers = await get_mentor_triggers_raw(30)
-    daily_history = await get_daily_scores(30)
+    utc_now = datetime.utcnow()
+    now = utc_now.isoformat()
+    today = utc_now.date().isoformat()
+
+    # Gather data; trades are limited to the last 30 days in SQL
+    cutoff = (utc_now - timedelta(days=30)).isoformat()
+    (recent_txns, holdings, portfolio, checklists,
+     mentor_triggers, daily_history) = await asyncio.gather(
+        get_transactions_since(cutoff), get_holdings(), get_portfolio(),
+        get_checklists_raw(30), get_mentor_triggers_raw(30), get_daily_scores(30),
+    )
 
     # Count trades in last 30 days
-    cutoff = (datetime.utcnow() - timedelta(days=30)).isoformat()
-    recent_txns = [t for t in transactions if t.get("timestamp", "") >= cutoff]
     trade_count = len(recent_txns)
 
     # Count active days
@@ -1550,10 +2551,19 @@ async def _compute_daily_scores_internal() -> Dict:
         trade_count, active_days > 0,
     )
 
-    # Update badges (pass mentor triggers for sentiment-aware badges)
-    updated_daily = await get_daily_scores(30)
+    # Update badges (pass mentor triggers for sentiment-aware badges).
+    # Today's row is merged into the history already in hand, newest first,
+    # matching what get_daily_scores(30) would now return.
+    today_row = {
+        "id": score_id, "date": today,
+        "risk_score": scores["risk"], "discipline_score": scores["discipline"],
+        "strategy_score": scores["strategy"], "psychology_score": scores["psychology"],
+        "consistency_score": scores["consistency"],
+        "trade_count": trade_count, "active_day": int(active_days > 0),
+        "computed_at": now,
+    }
+    updated_daily = [today_row] + [d for d in daily_history if d.get("date") != today]
     badge_results = evaluate_badges(updated_daily, mentor_triggers)
-    now = datetime.utcnow().isoformat()
     for b in badge_results:
         badge_id = f"badge-{b['badge_type']}"
         await upsert_badge(
@@ -1570,29 +2580,37 @@ async def evaluation_compute():
     return await _compute_daily_scores_internal()
 
 
+# Required qualifying days per badge type, resolved once from the definitions
+_REQUIRED_DAYS = {k: v.get("days", 21) for k, v in BADGE_DEFINITIONS.items()}
+
+
 @app.get("/api/evaluation/badges")
-async def evaluation_get_badges():
+async def evaluation_get_badges(request: Request):
     """Get all badge statuses."""
+    # Badges only change through upsert_badge, which stamps updated_at, so a
+    # one-row aggregate is enough to answer a revalidation
+    etag = f'W/"badges-{hashlib.sha1((await get_badges_version()).encode()).hexdigest()[:16]}"'
+    if etag_matches(request, etag):
+        return conditional_response(request, None, etag)
+
     badges = await get_badges()
     # Add required_days from definitions
-    for b in badges:
-        defn = BADGE_DEFINITIONS.get(b.get("badgeType", ""), {})
-        b["requiredDays"] = defn.get("days", 21)
-    return {"badges": badges}
+    badges = [{**b, "requiredDays": _REQUIRED_DAYS.get(b.get("badgeType", ""), 21)} for b in badges]
+    return conditional_response(request, {"badges": badges}, etag)
 
 
 @app.get("/api/evaluation/report/latest")
-async def evaluation_latest_report():
+async def evaluation_latest_report(request: Request):
     """Get the most recent monthly report."""
     report = await get_latest_report()
-    return {"report": report}
+    return conditional_response(request, {"report": report})
 
 
 @app.get("/api/evaluation/report/history")
-async def evaluation_report_history(limit: int = Query(12)):
+async def evaluation_report_history(request: Request, limit: int = Query(12)):
     """Get report history."""
     reports = await get_report_history(limit)
-    return {"reports": reports}
+    return conditional_response(request, {"reports": reports})
 
 
 @app.post("/api/evaluation/report/generate")
@@ -1602,68 +2620,63 @@ async def evaluation_generate_report():
     period_end = now.date().isoformat()
     period_start = (now - timedelta(days=30)).date().isoformat()
 
+    # Independent reads for the report, fetched together. The 60-day score
+    # history covers the current 30-day window, so it is read only once.
+    cutoff = (now - timedelta(days=30)).isoformat()
+    recent, triggers, daily_60, checklist_stats_data = await asyncio.gather(
+        get_transactions_since(cutoff), get_mentor_triggers_raw(30),
+        get_daily_scores(60), get_checklist_stats(30),
+    )
+
     # Get scores
-    daily = await get_daily_scores(30)
+    cutoff_30 = period_start
+    daily = [d for d in daily_60 if d.get("date", "") >= cutoff_30]
     if not daily:
         return {"error": "No daily scores available. Compute scores first."}
 
-    # Average scores
+    # Average scores (ignoring zero/missing days), in one pass per window
     score_keys = ["risk_score", "discipline_score", "strategy_score", "psychology_score", "consistency_score"]
-    avgs = {}
-    for key in score_keys:
-        vals = [d.get(key, 0) for d in daily if d.get(key, 0) > 0]
-        short_key = key.replace("_score", "")
-        avgs[short_key] = round(sum(vals) / len(vals), 1) if vals else 0
+
+    def _avg_window(window):
+        sums = {key: 0.0 for key in score_keys}
+        counts = {key: 0 for key in score_keys}
+        for d in window:
+            for key in score_keys:
+                v = d.get(key, 0)
+                if v > 0:
+                    sums[key] += v
+                    counts[key] += 1
+        return {
+            key.replace("_score", ""): round(sums[key] / counts[key], 1) if counts[key] else 0
+            for key in score_keys
+        }
+
+    avgs = _avg_window(daily)
 
     grade = compute_overall_grade(avgs)
 
     # Best/worst trade
-    transactions = await get_transactions()
-    cutoff = (now - timedelta(days=30)).isoformat()
-    recent = [t for t in transactions if t.get("timestamp", "") >= cutoff]
     sells = [t for t in recent if t.get("action") == "sell"]
 
-    best_trade = None
-    worst_trade = None
-    if sells:
-        # Simple: best = highest total, worst = lowest total (for sells)
-        sells_sorted = sorted(sells, key=lambda s: s.get("total", 0))
-        worst_trade = sells_sorted[0]
-        best_trade = sells_sorted[-1]
+    # Simple: best = highest total, worst = lowest total (for sells).
+    # Ties resolve as a stable sort would: first lowest, last highest.
+    sell_total = lambda s: s.get("total", 0)
+    worst_trade = min(sells, key=sell_total, default=None)
+    best_trade = max(reversed(sells), key=sell_total, default=None)
 
-    # Detected patterns
-    triggers = await get_mentor_triggers_raw(30)
-    patterns = list(set(t.get("pattern_type", "") for t in triggers if t.get("pattern_type")))
+    # Detected patterns and how often each fired
+    pattern_frequency = Counter(t["pattern_type"] for t in triggers if t.get("pattern_type"))
+    patterns = list(pattern_frequency)
 
     # Gather enrichment data for deeper report
     # Trend data: current vs previous 30-day averages
-    daily_60 = await get_daily_scores(60)
-    cutoff_30 = (now - timedelta(days=30)).date().isoformat()
-    current_window = [d for d in daily_60 if d.get("date", "") >= cutoff_30]
     previous_window = [d for d in daily_60 if d.get("date", "") < cutoff_30]
 
-    def _avg_window(window):
-        result = {}
-        for key in score_keys:
-            vals = [d.get(key, 0) for d in window if d.get(key, 0) > 0]
-            result[key.replace("_score", "")] = round(sum(vals) / len(vals), 1) if vals else 0
-        return result
-
     trend_data = {
-        "current": _avg_window(current_window),
+        "current": avgs,
         "previous": _avg_window(previous_window),
     }
 
-    # Pattern frequency
-    pattern_frequency = {}
-    for t in triggers:
-        pt = t.get("pattern_type", "")
-        if pt:
-            pattern_frequency[pt] = pattern_frequency.get(pt, 0) + 1
-
-    # Checklist stats
-    checklist_stats_data = await get_checklist_stats(30)
-
     # Trade stats
     buys = [t for t in recent if t.get("action") == "buy"]
     trade_stats = {
@@ -1675,12 +2688,13 @@ async def evaluation_generate_report():
 
     # Build sentiment context for report
     report_sentiment_ctx = None
-    traded_syms = set(t.get('symbol', '') for t in recent if t.get('symbol'))
+    traded_syms = {t['symbol'] for t in recent if t.get('symbol')}
     if traded_syms:
-        from database import get_cached_sentiment
         sent_lines = []
-        for sym in list(traded_syms)[:5]:
-            cached_sent = await get_cached_sentiment(sym)
+        syms = list(traded_syms)[:5]
+        cached_map = await get_cached_sentiment_batch(syms)
+        for sym in syms:
+            cached_sent = cached_map.get(sym)
             if cached_sent:
                 sent_lines.append(
                     f"  {sym}: {cached_sent.get('mood', 'neutral')} — {cached_sent.get('summary', 'N/A')}"
@@ -1688,15 +2702,32 @@ async def evaluation_generate_report():
         if sent_lines:
             report_sentiment_ctx = "\n".join(sent_lines)
 
-    # Gemini summary with enriched data
-    summary = await generate_report_summary(
-        avgs, grade, patterns, best_trade, worst_trade,
+    # Gemini summary with enriched data, keyed on everything in the prompt
+    summary_key = content_key("gemini:report", {
+        "model": REPORT_MODEL_NAME,
+        "scores": avgs, "grade": grade, "patterns": sorted(patterns),
+        "best": best_trade.get("symbol") if best_trade else None,
+        "worst": worst_trade.get("symbol") if worst_trade else None,
+        "trend": trend_data, "freq": pattern_frequency,
+        "checklists": checklist_stats_data, "trades": trade_stats,
+        "sent": report_sentiment_ctx,
+    })
+    report_args = (avgs, grade, patterns, best_trade, worst_trade)
+    report_kwargs = dict(
         trend_data=trend_data,
         pattern_frequency=pattern_frequency,
         checklist_stats=checklist_stats_data,
         trade_stats=trade_stats,
         sentiment_context=report_sentiment_ctx,
     )
+    summary = await cached_call(
+        summary_key, _report_summary_ttl(now),
+        lambda: semantic_call(
+            build_report_prompt(*report_args, **report_kwargs),
+            {"kind": "report", "grade": grade, "period": period_end[:7]},
+            lambda: generate_report_summary(*report_args, **report_kwargs),
+        ),
+    ) or fallback_report_summary(grade)
 
     # Badge updates
     badges = await get_badges()
@@ -1715,7 +2746,7 @@ async def evaluation_generate_report():
         grade,
         best_trade.get("id") if best_trade else None,
         worst_trade.get("id") if worst_trade else None,
-        json.dumps(patterns), summary, json.dumps(badge_updates),
+        orjson.dumps(patterns).decode(), summary, orjson.dumps(badge_updates).decode(),
         now.isoformat(),
     )
 
@@ -1735,21 +2766,22 @@ async def challenges_get_active():
     # If no active challenges, seed them
     if not active:
         now = datetime.utcnow()
+        now_iso = now.isoformat()
+        now_ms = int(now.timestamp() * 1000)
         for tmpl in CHALLENGE_TEMPLATES:
-            challenge_id = f"ch-{tmpl['challenge_type']}-{int(now.timestamp() * 1000)}"
+            challenge_id = f"ch-{tmpl['challenge_type']}-{now_ms}"
             expires = (now + timedelta(days=tmpl["duration_days"])).isoformat()
             await add_challenge(
                 challenge_id, tmpl["challenge_type"], tmpl["title"],
                 tmpl["description"], tmpl["target_value"],
-                now.isoformat(), expires,
+                now_iso, expires,
             )
         active = await get_active_challenges()
 
     # Compute current progress for each
-    transactions = await get_transactions()
-    holdings = await get_holdings()
-    portfolio = await get_portfolio()
-    checklists_raw = await get_checklists_raw(30)
+    transactions, holdings, portfolio, checklists_raw = await asyncio.gather(
+        get_transactions(), get_holdings(), get_portfolio(), get_checklists_raw(30),
+    )
 
     for ch in active:
         progress_val = compute_challenge_progress(
@@ -1766,12 +2798,12 @@ async def challenges_get_active():
 async def challenges_refresh():
     """Recompute progress and rotate expired challenges."""
     now = datetime.utcnow()
+    now_iso = now.isoformat()
 
-    active = await get_active_challenges()
-    transactions = await get_transactions()
-    holdings = await get_holdings()
-    portfolio = await get_portfolio()
-    checklists_raw = await get_checklists_raw(30)
+    active, transactions, holdings, portfolio, checklists_raw = await asyncio.gather(
+        get_active_challenges(), get_transactions(), get_holdings(),
+        get_portfolio(), get_checklists_raw(30),
+    )
 
     for ch in active:
         progress_val = compute_challenge_progress(
@@ -1781,8 +2813,8 @@ async def challenges_refresh():
 
         # Check if completed
         if progress_val >= ch["targetValue"]:
-            await update_challenge(ch["id"], progress_val, "completed", now.isoformat())
-        elif now.isoformat() > ch["expiresAt"]:
+            await update_challenge(ch["id"], progress_val, "completed", now_iso)
+        elif now_iso > ch["expiresAt"]:
             await update_challenge(ch["id"], progress_val, "expired")
         else:
             await update_challenge(ch["id"], progress_val, "active")
@@ -1797,7 +2829,7 @@ async def challenges_refresh():
             await add_challenge(
                 challenge_id, tmpl["challenge_type"], tmpl["title"],
                 tmpl["description"], tmpl["target_value"],
-                now.isoformat(), expires,
+                now_iso, expires,
             )
 
     updated = await get_active_challenges()
@@ -1805,10 +2837,10 @@ async def challenges_refresh():
 
 
 @app.get("/api/challenges/history")
-async def challenges_history(limit: int = Query(20)):
+async def challenges_history(request: Request, limit: int = Query(20)):
     """Get past challenge completions."""
     history = await get_challenge_history(limit)
-    return {"challenges": history}
+    return conditional_response(request, {"challenges": history})
 
 
 @app.get("/api/evaluation/profile")
@@ -1842,7 +2874,7 @@ async def journal_create(entry: JournalEntryRequest):
     if not entry.symbol or not entry.note:
         raise HTTPException(status_code=400, detail="Symbol and note are required")
 
-    entry_id = f"j-{int(datetime.utcnow().timestamp() * 1000)}-{uuid.uuid4().hex[:8]}"
+    entry_id = new_id("j-")
     created_at = datetime.utcnow().isoformat()
 
     await add_journal_entry(
@@ -1863,10 +2895,10 @@ async def journal_create(entry: JournalEntryRequest):
 
 
 @app.get("/api/journal")
-async def journal_list(limit: int = Query(50), offset: int = Query(0)):
+async def journal_list(request: Request, limit: int = Query(50), offset: int = Query(0)):
     """Get journal entries."""
     entries = await get_journal_entries(limit, offset)
-    return {"entries": entries}
+    return conditional_response(request, {"entries": entries})
 
 
 @app.get("/api/journal/symbol/{symbol}")
@@ -1924,22 +2956,23 @@ async def sentiment_batch(req: SentimentBatchRequest):
 
 @app.get("/api/sentiment/history")
 async def sentiment_history_endpoint(
+    request: Request,
     symbol: str = Query(..., description="Stock/crypto symbol"),
     days: int = Query(30, description="Number of days of history"),
 ):
     """Get historical sentiment snapshots for a symbol."""
     history = await get_sentiment_history(symbol.upper(), days)
-    return {"history": history}
+    return conditional_response(request, {"history": history})
 
 
 # ============================================================================
 # DIVERGENCE
 # ============================================================================
 
-# In-memory cache for divergence results (30-min TTL)
-_divergence_cache: Dict[str, Dict] = {}
-_divergence_cache_ts: Dict[str, float] = {}
+# Divergence results are shared across workers via cache.cached_call
+# (key divergence:{SYM}); one worker computes a cold symbol, the rest wait
 DIVERGENCE_CACHE_TTL = 1800  # 30 minutes
+DIVERGENCE_REFRESH_AHEAD = 120  # recompute in the background in the last 2 minutes
 
 DIVERGENCE_SIGNALS = {
     "caution_zone": {
@@ -1971,74 +3004,16 @@ async def sentiment_divergence(
     name: str = Query("", description="Company/asset name"),
 ):
     """Detect price-sentiment divergence for educational insight."""
-    import time
-
     sym = symbol.upper()
-    now = time.time()
-
-    # Check cache
-    if sym in _divergence_cache and (now - _divergence_cache_ts.get(sym, 0)) < DIVERGENCE_CACHE_TTL:
-        return _divergence_cache[sym]
 
     try:
-        # 1. Fetch 30D historical data
-        hist_result = await fetch_yfinance_historical(sym, "1M")
-        hist_data = hist_result.get("data", [])
-
-        # 2. Get sentiment (will hit cache if available)
-        sentiment_result = await get_sentiment(sym, name or sym)
-
-        # 3. Compute price change
-        price_change_pct = 0.0
-        if len(hist_data) >= 2:
-            first_close = hist_data[0].get("close", 0)
-            last_close = hist_data[-1].get("close", 0)
-            if first_close > 0:
-                price_change_pct = round(((last_close - first_close) / first_close) * 100, 2)
-
-        # 4. Get sentiment percentages
-        positive_pct = sentiment_result.get("positive_pct", 0)
-        negative_pct = sentiment_result.get("negative_pct", 0)
-        mood = sentiment_result.get("mood", "neutral")
-
-        # 5. Apply divergence rules
-        signal = "neutral"
-        if price_change_pct > 5 and negative_pct > 45:
-            signal = "caution_zone"
-        elif price_change_pct < -5 and positive_pct > 45:
-            signal = "recovery_watch"
-        elif price_change_pct > 0 and positive_pct > negative_pct:
-            signal = "strong_trend"
-        elif price_change_pct < 0 and negative_pct > positive_pct:
-            signal = "weak_trend"
-
-        sig_info = DIVERGENCE_SIGNALS[signal]
-        result = {
-            "symbol": sym,
-            "signal": signal,
-            "label": sig_info["label"],
-            "description": sig_info["description"],
-            "price_change_30d_pct": price_change_pct,
-            "sentiment_mood": mood,
-            "positive_pct": positive_pct,
-            "negative_pct": negative_pct,
-            "educational_only": True,
-        }
-
-        # Cache result
-        _divergence_cache[sym] = result
-        _divergence_cache_ts[sym] = now
-
-        # Save snapshot to DB in background
-        try:
-            await save_divergence_snapshot(sym, signal, price_change_pct, mood)
-        except Exception as e:
-            print(f"Failed to save divergence snapshot: {e}")
-
-        return result
-
+        return await cached_call(
+            f"divergence:{sym}", DIVERGENCE_CACHE_TTL,
+            lambda: _compute_divergence(sym, name),
+            refresh_ahead=DIVERGENCE_REFRESH_AHEAD,
+        )
     except Exception as e:
-        print(f"Divergence calculation error for {sym}: {e}")
+        logger.warning("Divergence calculation error for %s: %s", sym, e)
         return {
             "symbol": sym,
             "signal": "neutral",
@@ -2052,6 +3027,72 @@ async def sentiment_divergence(
         }
 
 
+async def _compute_divergence(sym: str, name: str) -> Dict:
+    """Compute the divergence signal for sym and record a daily snapshot."""
+    # 1. Fetch 30D historical data
+    hist_result = await fetch_yfinance_historical(sym, "1M")
+    hist_data = hist_result.get("data", [])
+
+    # 2. Get sentiment (will hit cache if available)
+    sentiment_result = await get_sentiment(sym, name or sym)
+
+    # 3. Compute price change
+    price_change_pct = 0.0
+    if len(hist_data) >= 2:
+        first_close = hist_data[0].get("close", 0)
+        last_close = hist_data[-1].get("close", 0)
+        if first_close > 0:
+            price_change_pct = round(((last_close - first_close) / first_close) * 100, 2)
+
+    # 4. Get sentiment percentages
+    positive_pct = sentiment_result.get("positive_pct", 0)
+    negative_pct = sentiment_result.get("negative_pct", 0)
+    mood = sentiment_result.get("mood", "neutral")
+
+    # 5. Apply divergence rules
+    signal = "neutral"
+    if price_change_pct > 5 and negative_pct > 45:
+        signal = "caution_zone"
+    elif price_change_pct < -5 and positive_pct > 45:
+        signal = "recovery_watch"
+    elif price_change_pct > 0 and positive_pct > negative_pct:
+        signal = "strong_trend"
+    elif price_change_pct < 0 and negative_pct > positive_pct:
+        signal = "weak_trend"
+
+    sig_info = DIVERGENCE_SIGNALS[signal]
+    result = {
+        "symbol": sym,
+        "signal": signal,
+        "label": sig_info["label"],
+        "description": sig_info["description"],
+        "price_change_30d_pct": price_change_pct,
+        "sentiment_mood": mood,
+        "positive_pct": positive_pct,
+        "negative_pct": negative_pct,
+        "educational_only": True,
+    }
+
+    # Save snapshot to DB off the response path. This may run in a background
+    # refresh with no request attached, so it is a plain task, not BackgroundTasks
+    task = asyncio.create_task(_save_divergence_snapshot(sym, signal, price_change_pct, mood))
+    _snapshot_writes.add(task)
+    task.add_done_callback(_snapshot_writes.discard)
+
+    return result
+
+
+# Strong refs to in-flight snapshot writes so they aren't garbage collected
+_snapshot_writes: set = set()
+
+
+async def _save_divergence_snapshot(sym: str, signal: str, price_change_pct: float, mood: str):
+    try:
+        await save_divergence_snapshot(sym, signal, price_change_pct, mood)
+    except Exception as e:
+        logger.warning("Failed to save divergence snapshot: %s", e)
+
+
 if __name__ == "__main__":
     import uvicorn
 
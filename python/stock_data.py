@@ -1,33 +1,435 @@
 #!/usr/bin/env python3
+"""
+Stock data CLI backed by yfinance.
+
+One-shot:  python stock_data.py <operation> <params_json>
+Daemon:    python stock_data.py --serve
+           reads {"id", "op", "params"} JSON lines on stdin and writes
+           {"id", "result"} lines on stdout, so imports, the HTTP session
+           and yfinance's cookie/crumb are paid for once per process.
+"""
+import os
 import sys
+import re
 import json
+import pickle
+import random
+import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
 from datetime import datetime
 
 try:
     import yfinance as yf
+    from yfinance.data import YfData
+    try:
+        from yfinance.exceptions import YFRateLimitError
+    except ImportError:  # yfinance < 0.2.55 surfaces 429s as HTTPError only
+        YFRateLimitError = None
 except ImportError:
     print(json.dumps({"error": "yfinance module not installed. Run: pip install yfinance"}))
     sys.exit(1)
 
-if len(sys.argv) < 3:
-    print(json.dumps({"error": "Usage: python stock_data.py <operation> <params_json>"}))
-    sys.exit(1)
+# orjson encodes the large historical payloads (and their NumPy columns) natively
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-operation = sys.argv[1]
-params_json = sys.argv[2]
+# Shared result cache across processes (optional - set REDIS_URL to enable)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+# yfinance >= 0.2.54 only accepts curl_cffi sessions (and depends on curl_cffi),
+# so use one whenever it is installed; older yfinance takes a requests.Session.
 try:
-    params = json.loads(params_json)
-except json.JSONDecodeError:
-    print(json.dumps({"error": "Invalid JSON parameters"}))
-    sys.exit(1)
+    from curl_cffi import requests as curl_requests
+    CURL_CFFI_AVAILABLE = True
+except ImportError:
+    CURL_CFFI_AVAILABLE = False
 
+# Brotli-compressed responses are only requested when urllib3 can decode them
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, br, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Shared HTTP session: keeps connections and Yahoo's cookie/crumb across calls
+if CURL_CFFI_AVAILABLE:
+    # libcurl pools connections and negotiates compression per the impersonated browser
+    SESSION = curl_requests.Session(impersonate="chrome")
+else:
+    SESSION = requests.Session()
+    SESSION.mount("https://", HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,  # >= SERVE_WORKERS plus concurrent quote batches
+        # 429s are left to with_backoff, which also rotates the User-Agent
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]),
+    ))
+    SESSION.headers.update({"Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive"})
+
+# yfinance's cookie/crumb, persisted so new processes skip the handshake
+CRUMB_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "stockmind", "yf_crumb.pkl")
+CRUMB_CACHE_TTL = 3600
+_crumb_preloaded = False  # crumb came from disk; a 401/403 means it went stale
+
+RATE_LIMIT_RETRIES = 4  # sleeps of ~1s, 2s, 4s, 8s (plus jitter) before giving up
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+]
+RATE_LIMIT_ERROR = {
+    "error": "Rate limit exceeded. Please wait a moment and try again.",
+    "type": "rate_limit",
+    "status_code": 429
+}
+
+YAHOO_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+YAHOO_SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+SEARCH_MAX_RESULTS = 5  # matches priced per search
+SEARCH_QUERY_MAX_LEN = 64  # longer queries can't match a name or ticker
+SYMBOL_RE = re.compile(r"[A-Za-z0-9.\-^=]{1,10}")  # ticker-shaped, e.g. BRK-B, ^GSPC, EURUSD=X
+QUOTE_BATCH_SIZE = 20  # symbols per v7 quote request (Yahoo's documented per-call limit)
+# Only what summary and search read, so Yahoo skips the rest of each quote
+V7_QUOTE_FIELDS = ",".join([
+    "symbol", "shortName", "longName", "exchange", "currency",
+    "regularMarketPrice", "regularMarketChange", "regularMarketChangePercent",
+    "regularMarketPreviousClose", "market",
+])
+
+# Yahoo listing market prefix (e.g. "in" from "in_market") -> country shown in search
+MARKET_COUNTRY_MAP = {
+    'us': 'United States',
+    'in': 'India',
+    'gb': 'United Kingdom',
+    'de': 'Germany',
+    'fr': 'France',
+    'ca': 'Canada',
+    'au': 'Australia',
+    'jp': 'Japan',
+    'hk': 'Hong Kong',
+    'cn': 'China',
+}
+
+# Chart range -> yfinance history() parameters
+RANGE_MAP = {
+    '1D': {'period': '1d', 'interval': '5m'},
+    '5D': {'period': '5d', 'interval': '15m'},
+    '1M': {'period': '1mo', 'interval': '1d'},
+    '6M': {'period': '6mo', 'interval': '1d'},
+    '1Y': {'period': '1y', 'interval': '1d'},
+    'MAX': {'period': 'max', 'interval': '1wk'},
+}
+
+# Market -> index symbols shown in its summary
+MARKET_MAP = {
+    'US': ['^GSPC', '^DJI', '^IXIC'],
+    'India': ['^NSEI', '^BSESN'],
+    'Europe': ['^FTSE', '^GDAXI', '^FCHI'],
+    'global': ['^GSPC', '^DJI', '^IXIC', '^NSEI'],
+}
+
+# Display names for index symbols (preferred over Yahoo's shortName)
+INDEX_NAME_MAP = {
+    '^GSPC': 'S&P 500',
+    '^DJI': 'Dow Jones',
+    '^IXIC': 'Nasdaq',
+    '^NSEI': 'Nifty 50',
+    '^BSESN': 'Sensex',
+    '^FTSE': 'FTSE 100',
+    '^GDAXI': 'DAX',
+    '^FCHI': 'CAC 40',
+}
+
+# Result cache TTLs in seconds. The in-process copy only spans calls in
+# --serve mode; with REDIS_URL set, results are shared across processes too.
+QUOTE_CACHE_TTL = 10
+SUMMARY_CACHE_TTL = 30
+HISTORICAL_CACHE_TTL = 300
+INTRADAY_CACHE_TTL = 60  # 1D/5D bars move faster than daily ones
+ERROR_CACHE_TTL = 2  # brief, so an outage doesn't turn into a burst of retries
+REDIS_HIT_LOCAL_TTL = 2  # Redis hits are kept locally only briefly (remaining TTL unknown)
+CACHE_MAX_ENTRIES = 512  # expired entries are swept once the cache grows past this
+
+_cache = {}  # (op, *args) -> (expires_at, result)
+_cache_lock = threading.Lock()
+_redis = None
+
+_inflight = {}  # (op, *args) -> Future for the call currently fetching it
+_inflight_lock = threading.Lock()
+
+SERVE_WORKERS = 8  # concurrent requests handled in --serve mode
+_stdout_lock = threading.Lock()
+
+STATS = {"cached_dedupe": 0}  # callers served by another caller's in-flight fetch
+
+
+def get_redis():
+    """Lazily create the shared Redis client; None when Redis is unavailable."""
+    global _redis
+    if _redis is None and REDIS_AVAILABLE and REDIS_URL:
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis
+
+
+def _redis_get(key):
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(key)
+    except Exception:
+        return None  # Redis down: fall through to Yahoo
+    return decode(raw) if raw is not None else None
+
+
+def _redis_set(key, value, ttl):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl, encode(value))
+    except Exception:
+        pass
+
+
+def ttl_cached(ttl):
+    """
+    Memoize a fetcher's result per argument tuple for ttl seconds (or
+    ttl(*args) if callable; ERROR_CACHE_TTL for error results), in process
+    and, when configured, in Redis.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            key = (func.__name__, *args)
+            now = time.monotonic()
+            entry = _cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+            redis_key = "stockdata:" + ":".join(str(part) for part in key)
+            result = _redis_get(redis_key)
+            if result is not None:
+                with _cache_lock:
+                    _cache[key] = (now + REDIS_HIT_LOCAL_TTL, result)
+                return result
+
+            result = func(*args)
+            is_error = isinstance(result, dict) and 'error' in result
+            seconds = ERROR_CACHE_TTL if is_error else (ttl(*args) if callable(ttl) else ttl)
+            _redis_set(redis_key, result, seconds)
+            with _cache_lock:
+                if len(_cache) >= CACHE_MAX_ENTRIES:
+                    for k in [k for k, (exp, _) in _cache.items() if exp <= now]:
+                        del _cache[k]
+                _cache[key] = (now + seconds, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def single_flight(func):
+    """Coalesce concurrent calls with the same arguments into one upstream
+    fetch; the other callers wait on its Future and share the result."""
+    @wraps(func)
+    def wrapper(*args):
+        key = (func.__name__, *args)
+        with _inflight_lock:
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = Future()
+            else:
+                STATS["cached_dedupe"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+        return future.result()
+    return wrapper
+
+
+def http_status(exc):
+    """HTTP status carried by a requests or curl_cffi error, if any."""
+    return getattr(getattr(exc, 'response', None), 'status_code', None)
+
+
+def is_rate_limited(exc):
+    """True for a Yahoo 429, however this yfinance version surfaces it."""
+    if YFRateLimitError is not None and isinstance(exc, YFRateLimitError):
+        return True
+    return http_status(exc) == 429
+
+
+def load_crumb():
+    """Seed SESSION and yfinance with a cookie/crumb saved within CRUMB_CACHE_TTL."""
+    global _crumb_preloaded
+    try:
+        if time.time() - os.path.getmtime(CRUMB_CACHE_PATH) > CRUMB_CACHE_TTL:
+            return
+        with open(CRUMB_CACHE_PATH, "rb") as f:
+            saved = pickle.load(f)
+        for name, value, domain, path in saved["cookies"]:
+            SESSION.cookies.set(name, value, domain=domain, path=path)
+        data = YfData(session=SESSION)
+        data._crumb = saved["crumb"]
+        if saved.get("strategy") and hasattr(data, "_cookie_strategy"):
+            data._cookie_strategy = saved["strategy"]
+        _crumb_preloaded = True
+    except Exception:
+        pass  # missing, stale or unreadable: yfinance bootstraps as usual
+
+
+def save_crumb():
+    """
+    Persist the session's cookie/crumb once yfinance has one, unless the
+    saved copy is still fresh. Never raises: the cache is only an optimization.
+    """
+    try:
+        try:
+            if time.time() - os.path.getmtime(CRUMB_CACHE_PATH) <= CRUMB_CACHE_TTL:
+                return
+        except OSError:
+            pass
+        data = YfData(session=SESSION)
+        crumb = getattr(data, "_crumb", None)
+        if not crumb:
+            return
+        # Plain tuples: curl_cffi's and requests' jars differ and may not pickle
+        jar = getattr(SESSION.cookies, "jar", SESSION.cookies)
+        cookies = [(c.name, c.value, c.domain, c.path) for c in jar]
+        os.makedirs(os.path.dirname(CRUMB_CACHE_PATH), exist_ok=True)
+        tmp = f"{CRUMB_CACHE_PATH}.{os.getpid()}"
+        with open(tmp, "wb") as f:
+            pickle.dump({
+                "cookies": cookies,
+                "crumb": crumb,
+                "strategy": getattr(data, "_cookie_strategy", None),
+            }, f)
+        os.replace(tmp, CRUMB_CACHE_PATH)
+    except Exception:
+        pass
+
+
+def _drop_crumb():
+    """Forget a rejected cookie/crumb so yfinance fetches a fresh one."""
+    global _crumb_preloaded
+    _crumb_preloaded = False
+    try:
+        SESSION.cookies.clear()
+        YfData(session=SESSION)._crumb = None
+    except Exception:
+        pass
+    try:
+        os.remove(CRUMB_CACHE_PATH)
+    except OSError:
+        pass
+
+
+def with_backoff(fn, *args, **kwargs):
+    """
+    Call fn, retrying on Yahoo rate limits with jittered exponential
+    backoff (and, on a plain requests session, a fresh User-Agent; curl_cffi
+    keeps its impersonated browser's). The last 429 is re-raised.
+    A 401/403 on a crumb loaded from disk drops it and retries once.
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if _crumb_preloaded and http_status(e) in (401, 403):
+                _drop_crumb()
+                return with_backoff(fn, *args, **kwargs)
+            if not is_rate_limited(e) or attempt == RATE_LIMIT_RETRIES:
+                raise
+        else:
+            save_crumb()
+            return result
+        time.sleep(random.uniform(2 ** attempt, 2 ** attempt + 1))
+        if not CURL_CFFI_AVAILABLE:
+            SESSION.headers["User-Agent"] = random.choice(USER_AGENTS)
+
+
+def get_ticker(symbol):
+    """yf.Ticker bound to the shared session. Tickers are not reused, since
+    a Ticker memoizes .info and would serve stale quotes in --serve mode."""
+    return yf.Ticker(symbol, session=SESSION)
+
+
+def _quote_batch(data, batch):
+    """One v7 quote request for up to QUOTE_BATCH_SIZE symbols."""
+    payload = with_backoff(data.get_raw_json, YAHOO_QUOTE_URL, params={
+        "symbols": ",".join(batch), "fields": V7_QUOTE_FIELDS,
+    })
+    return (payload.get("quoteResponse") or {}).get("result") or []
+
+
+def _fetch_quotes(symbols):
+    """
+    Fetch price/change/name for many symbols with batched v7 quote calls.
+    YfData supplies yfinance's cookie/crumb on the shared session.
+    Returns {symbol: quote dict}; symbols Yahoo didn't return are absent.
+    """
+    data = YfData(session=SESSION)
+    quotes = {}
+    for i in range(0, len(symbols), QUOTE_BATCH_SIZE):
+        for item in _quote_batch(data, symbols[i:i + QUOTE_BATCH_SIZE]):
+            quotes[item.get("symbol")] = item
+    return quotes
+
+
+def _percent(fraction):
+    return float(fraction) * 100
+
+
+# get_quote fields copied from .info: (output key, info keys tried in order,
+# cast, default when none of them is set)
+QUOTE_FIELDS = [
+    ("preMarket", ("preMarketPrice",), float, None),
+    ("dayLow", ("regularMarketDayLow", "dayLow"), float, 0.0),
+    ("dayHigh", ("regularMarketDayHigh", "dayHigh"), float, 0.0),
+    ("yearLow", ("fiftyTwoWeekLow",), float, 0.0),
+    ("yearHigh", ("fiftyTwoWeekHigh",), float, 0.0),
+    ("marketCap", ("marketCap",), int, 0),
+    ("volume", ("volume", "regularMarketVolume"), int, 0),
+    ("avgVolume", ("averageVolume", "averageDailyVolume3Month"), int, 0),
+    ("pe", ("trailingPE", "forwardPE"), float, None),
+    ("eps", ("trailingEps",), float, None),
+    ("dividend", ("dividendRate",), float, None),
+    ("dividendYield", ("dividendYield",), _percent, None),
+    ("exchange", ("exchange", "fullExchangeName"), str, ''),
+    ("currency", ("currency",), str, 'USD'),
+    ("description", ("longBusinessSummary",), str, None),
+]
+
+
+@ttl_cached(QUOTE_CACHE_TTL)
+@single_flight
 def get_quote(symbol):
     """Get stock quote data"""
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+        ticker = get_ticker(symbol)
+        info = with_backoff(lambda: ticker.info)
 
         # Check if valid ticker
         if not info or 'symbol' not in info:
@@ -61,184 +463,151 @@ def get_quote(symbol):
             "price": float(price),
             "change": float(change),
             "changePercent": float(change_percent),
-            "preMarket": float(info.get('preMarketPrice')) if info.get('preMarketPrice') else None,
             "previousClose": float(prev_close),
-            "dayLow": float(info.get('regularMarketDayLow') or info.get('dayLow') or 0),
-            "dayHigh": float(info.get('regularMarketDayHigh') or info.get('dayHigh') or 0),
-            "yearLow": float(info.get('fiftyTwoWeekLow') or 0),
-            "yearHigh": float(info.get('fiftyTwoWeekHigh') or 0),
-            "marketCap": int(info.get('marketCap') or 0),
-            "volume": int(info.get('volume') or info.get('regularMarketVolume') or 0),
-            "avgVolume": int(info.get('averageVolume') or info.get('averageDailyVolume3Month') or 0),
-            "pe": float(info.get('trailingPE') or info.get('forwardPE') or 0) if (info.get('trailingPE') or info.get('forwardPE')) else None,
-            "eps": float(info.get('trailingEps') or 0) if info.get('trailingEps') else None,
-            "dividend": float(info.get('dividendRate') or 0) if info.get('dividendRate') else None,
-            "dividendYield": float(info.get('dividendYield') * 100) if info.get('dividendYield') else None,
-            "exchange": info.get('exchange') or info.get('fullExchangeName') or '',
-            "currency": info.get('currency') or 'USD',
-            "description": info.get('longBusinessSummary') or None,
         }
+        for key, candidates, cast, default in QUOTE_FIELDS:
+            value = next((info[c] for c in candidates if info.get(c)), None)
+            result[key] = cast(value) if value is not None else default
 
         return result
     except Exception as e:
+        if is_rate_limited(e):
+            return dict(RATE_LIMIT_ERROR)
         return {"error": f"Failed to fetch quote: {str(e)}"}
 
+@single_flight
 def search_stocks(query):
     """
-    Search for stocks using lightweight ticker validation.
-    Uses history() first for validation (lighter than .info).
+    Search for stocks via Yahoo's autocomplete endpoint, then price the
+    top matches with one batched quote call. Queries that can't match
+    anything are rejected before any request; a ticker-shaped query the
+    search endpoint misses is tried against the quote endpoint directly.
     Returns error objects on failure instead of empty arrays.
     """
-    try:
-        # Use history() for lightweight validation (avoids heavy .info call initially)
-        ticker = yf.Ticker(query.upper())
-        hist = ticker.history(period="1d")
+    query = query.strip()
+    if not query or len(query) > SEARCH_QUERY_MAX_LEN or not any(c.isalnum() for c in query):
+        return []
 
-        if hist.empty:
-            # Try lowercase
-            ticker = yf.Ticker(query.lower())
-            hist = ticker.history(period="1d")
-            if hist.empty:
+    try:
+        payload = with_backoff(
+            YfData(session=SESSION).get_raw_json, YAHOO_SEARCH_URL,
+            params={"q": query, "quotesCount": 10, "newsCount": 0},
+        )
+        matches = [q for q in payload.get("quotes") or [] if q.get("symbol")][:SEARCH_MAX_RESULTS]
+        guessed = not matches
+        if guessed:
+            if not SYMBOL_RE.fullmatch(query):
                 return []
+            matches = [{"symbol": query.upper()}]
+
+        quotes = _fetch_quotes([m["symbol"] for m in matches])
+        if guessed and not quotes:
+            return []
+
+        results = []
+        for match in matches:
+            symbol = match["symbol"]
+            quote = quotes.get(symbol) or {}
+            results.append({
+                "symbol": symbol,
+                "name": (quote.get('longName') or quote.get('shortName')
+                         or match.get('longname') or match.get('shortname') or symbol),
+                "exchange": quote.get('exchange') or match.get('exchange') or '',
+                "country": MARKET_COUNTRY_MAP.get((quote.get('market') or '')[:2], ''),
+                "price": float(quote.get('regularMarketPrice') or 0),
+                "change": float(quote.get('regularMarketChange') or 0),
+                "changePercent": float(quote.get('regularMarketChangePercent') or 0),
+                "currency": quote.get('currency') or 'USD',
+            })
 
-        # Now get basic info (still needed for company name, etc.)
-        symbol = ticker.ticker
-        try:
-            info = ticker.info
-            name = info.get('longName') or info.get('shortName') or symbol
-            price = info.get('currentPrice') or info.get('regularMarketPrice') or hist['Close'].iloc[-1]
-            change = info.get('regularMarketChange', 0)
-            change_percent = info.get('regularMarketChangePercent', 0)
-            exchange = info.get('exchange') or info.get('fullExchangeName') or ''
-            country = info.get('country') or ''
-            currency = info.get('currency') or 'USD'
-        except:
-            # Fallback if .info fails - use historical data
-            name = symbol
-            price = hist['Close'].iloc[-1]
-            change = 0
-            change_percent = 0
-            exchange = ''
-            country = ''
-            currency = 'USD'
-
-        result = {
-            "symbol": symbol,
-            "name": name,
-            "exchange": exchange,
-            "country": country,
-            "price": float(price),
-            "change": float(change),
-            "changePercent": float(change_percent),
-            "currency": currency,
-        }
-
-        return [result]
+        return results
 
-    except requests.exceptions.HTTPError as e:
+    except Exception as e:
         # Handle HTTP errors (like 429 rate limiting)
-        if hasattr(e, 'response') and e.response.status_code == 429:
+        if is_rate_limited(e):
+            return dict(RATE_LIMIT_ERROR)
+        if http_status(e) is not None:
             return {
-                "error": "Rate limit exceeded. Please wait a moment and try again.",
-                "type": "rate_limit",
-                "status_code": 429
+                "error": f"HTTP error: {str(e)}",
+                "type": "http_error"
             }
-        return {
-            "error": f"HTTP error: {str(e)}",
-            "type": "http_error"
-        }
-    except Exception as e:
         # Return error object instead of empty array
         return {
             "error": str(e),
             "type": "search_error"
         }
 
-def get_historical(symbol, range_param):
-    """Get historical data for charts"""
-    try:
-        ticker = yf.Ticker(symbol)
-
-        # Map range to yfinance parameters
-        range_map = {
-            '1D': {'period': '1d', 'interval': '5m'},
-            '5D': {'period': '5d', 'interval': '15m'},
-            '1M': {'period': '1mo', 'interval': '1d'},
-            '6M': {'period': '6mo', 'interval': '1d'},
-            '1Y': {'period': '1y', 'interval': '1d'},
-            'MAX': {'period': 'max', 'interval': '1wk'},
-        }
+def _historical_ttl(symbol, range_param, columnar=False):
+    return INTRADAY_CACHE_TTL if range_param in ('1D', '5D') else HISTORICAL_CACHE_TTL
 
-        params = range_map.get(range_param, {'period': '1mo', 'interval': '1d'})
-        hist = ticker.history(period=params['period'], interval=params['interval'])
+
+@ttl_cached(_historical_ttl)
+@single_flight
+def get_historical(symbol, range_param, columnar=False):
+    """
+    Get historical data for charts: a list of row dicts, or with columnar
+    one NumPy array per field (much smaller on the wire than repeated keys).
+    """
+    try:
+        ticker = get_ticker(symbol)
+        params = RANGE_MAP.get(range_param, RANGE_MAP['1M'])
+        hist = with_backoff(ticker.history, period=params['period'], interval=params['interval'])
 
         if hist.empty:
             return {"error": "No historical data available"}
 
-        # Convert DataFrame to list of dicts
-        data = []
-        for timestamp, row in hist.iterrows():
-            data.append({
-                'time': int(timestamp.timestamp()),  # Unix timestamp
-                'value': float(row['Close']),
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-            })
+        index = hist.index
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        times = index.values.astype('datetime64[s]').astype('int64')  # Unix timestamps
+
+        if columnar:
+            return {
+                "format": "columnar",
+                "time": times,
+                "open": hist['Open'].to_numpy('float64'),
+                "high": hist['High'].to_numpy('float64'),
+                "low": hist['Low'].to_numpy('float64'),
+                "close": hist['Close'].to_numpy('float64'),
+            }
+
+        # Convert DataFrame to list of dicts (vectorized; no per-row Series boxing)
+        frame = hist[['Open', 'High', 'Low', 'Close']].rename(
+            columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close'}
+        ).astype('float64')
+        frame['value'] = frame['close']
+        frame['time'] = times
+        data = frame[['time', 'value', 'open', 'high', 'low', 'close']].to_dict('records')
 
         return {"data": data}
     except Exception as e:
+        if is_rate_limited(e):
+            return dict(RATE_LIMIT_ERROR)
         return {"error": f"Failed to fetch historical data: {str(e)}"}
 
+@ttl_cached(SUMMARY_CACHE_TTL)
+@single_flight
 def get_summary(market):
     """Get market summary indices"""
     try:
-        # Market index mapping
-        market_map = {
-            'US': ['^GSPC', '^DJI', '^IXIC'],
-            'India': ['^NSEI', '^BSESN'],
-            'Europe': ['^FTSE', '^GDAXI', '^FCHI'],
-            'global': ['^GSPC', '^DJI', '^IXIC', '^NSEI'],
-        }
-
-        indices_symbols = market_map.get(market, market_map['US'])
+        indices_symbols = MARKET_MAP.get(market, MARKET_MAP['US'])
         indices = []
 
+        quotes = _fetch_quotes(indices_symbols)
+
         for symbol in indices_symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-
-                price = (info.get('currentPrice') or
-                        info.get('regularMarketPrice') or
-                        info.get('previousClose') or 0)
-
-                change = info.get('regularMarketChange') or 0
-                change_percent = info.get('regularMarketChangePercent') or 0
-
-                # Index name mapping
-                name_map = {
-                    '^GSPC': 'S&P 500',
-                    '^DJI': 'Dow Jones',
-                    '^IXIC': 'Nasdaq',
-                    '^NSEI': 'Nifty 50',
-                    '^BSESN': 'Sensex',
-                    '^FTSE': 'FTSE 100',
-                    '^GDAXI': 'DAX',
-                    '^FCHI': 'CAC 40',
-                }
-
-                indices.append({
-                    "symbol": symbol,
-                    "name": name_map.get(symbol, info.get('shortName') or symbol),
-                    "price": float(price),
-                    "change": float(change),
-                    "changePercent": float(change_percent),
-                })
-            except:
+            info = quotes.get(symbol)
+            if not info:
                 continue
 
+            indices.append({
+                "symbol": symbol,
+                "name": INDEX_NAME_MAP.get(symbol, info.get('shortName') or symbol),
+                "price": float(info.get('regularMarketPrice') or info.get('regularMarketPreviousClose') or 0),
+                "change": float(info.get('regularMarketChange') or 0),
+                "changePercent": float(info.get('regularMarketChangePercent') or 0),
+            })
+
         return {
             "indices": indices,
             "futures": [],
@@ -247,21 +616,106 @@ def get_summary(market):
             "losers": [],
         }
     except Exception as e:
+        if is_rate_limited(e):
+            return dict(RATE_LIMIT_ERROR)
         return {"error": f"Failed to fetch summary: {str(e)}"}
 
-# Route to appropriate function
-try:
+def handle(operation, params):
+    """Run one operation and return its JSON-serializable result."""
     if operation == 'quote':
-        result = get_quote(params.get('symbol', ''))
+        return get_quote(params.get('symbol', ''))
     elif operation == 'search':
-        result = search_stocks(params.get('query', ''))
+        return search_stocks(params.get('query', ''))
     elif operation == 'historical':
-        result = get_historical(params.get('symbol', ''), params.get('range', '1M'))
+        return get_historical(params.get('symbol', ''), params.get('range', '1M'),
+                              params.get('format') == 'columnar')
     elif operation == 'summary':
-        result = get_summary(params.get('market', 'US'))
-    else:
-        result = {"error": f"Unknown operation: {operation}"}
+        return get_summary(params.get('market', 'US'))
+    elif operation == 'stats':
+        return dict(STATS)
+    return {"error": f"Unknown operation: {operation}"}
+
+
+def _to_list(obj):
+    """json.dumps fallback for NumPy arrays when orjson isn't installed."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode(obj):
+    """Serialize a result to UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_to_list).encode()
+
+
+def decode(raw):
+    """Parse JSON bytes or str."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _write(payload):
+    with _stdout_lock:
+        sys.stdout.buffer.write(encode(payload) + b"\n")
+        sys.stdout.buffer.flush()
+
+
+def _respond(req_id, result):
+    _write({"id": req_id, "result": result})
+
+
+def _answer(req_id, operation, params):
+    try:
+        result = handle(operation, params)
+    except Exception as e:
+        result = {"error": str(e)}
+    _respond(req_id, result)
+
+
+def serve():
+    """
+    Answer newline-delimited JSON requests on stdin until EOF. Requests run
+    on a small thread pool (they block on network I/O, which releases the
+    GIL), so responses may come back out of order; match them by id.
+    """
+    with ThreadPoolExecutor(max_workers=SERVE_WORKERS) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                req = decode(line)
+            except json.JSONDecodeError as e:  # orjson's error subclasses this too
+                _respond(None, {"error": str(e)})
+                continue
+            pool.submit(_answer, req.get('id'), req.get('op', ''), req.get('params') or {})
+
+
+def main():
+    load_crumb()
+
+    if len(sys.argv) == 2 and sys.argv[1] == '--serve':
+        serve()
+        return
+
+    if len(sys.argv) < 3:
+        _write({"error": "Usage: python stock_data.py <operation> <params_json> | --serve"})
+        sys.exit(1)
+
+    try:
+        params = decode(sys.argv[2])
+    except json.JSONDecodeError:
+        _write({"error": "Invalid JSON parameters"})
+        sys.exit(1)
+
+    try:
+        _write(handle(sys.argv[1], params))
+    except Exception as e:
+        _write({"error": str(e)})
+
 
-    print(json.dumps(result))
-except Exception as e:
-    print(json.dumps({"error": str(e)}))
+if __name__ == '__main__':
+    main()
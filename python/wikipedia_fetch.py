@@ -1,55 +1,203 @@
 #!/usr/bin/env python3
+"""
+Wikipedia lookup CLI.
+
+One-shot:  python wikipedia_fetch.py <query>
+Daemon:    python wikipedia_fetch.py --serve
+           reads {"id", "query"} JSON lines on stdin and writes
+           {"id", "result"} lines on stdout.
+
+Talks to the MediaWiki REST and action APIs directly over one keep-alive
+session, rather than through the wikipedia package's search/page/parse
+round trips.
+"""
+import os
 import sys
 import json
+from urllib.parse import quote as url_quote
+
+import requests
 
+# orjson is several times faster than stdlib json for the long article bodies
 try:
-    import wikipedia
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    print(json.dumps({"error": "wikipedia module not installed. Run: pip install wikipedia"}))
-    sys.exit(1)
+    ORJSON_AVAILABLE = False
 
-if len(sys.argv) < 2:
-    print(json.dumps({"error": "No query provided"}))
-    sys.exit(1)
+# Shared page cache across processes (optional - set REDIS_URL to enable)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
-query = sys.argv[1]
+REDIS_URL = os.environ.get("REDIS_URL", "")
+WIKI_CACHE_TTL = 86400  # descriptions change rarely
 
+WIKI_REST_SUMMARY_URL = "https://en.wikipedia.org/api/rest_v1/page/summary/{title}"
+WIKI_ACTION_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKI_TIMEOUT = 10
+WIKI_SEARCH_CANDIDATES = 5  # search hits tried in order when earlier ones are disambiguation pages
+MAX_WIKI_CHARS = int(os.environ.get("MAX_WIKI_CHARS", "20000"))  # cap on fullText sent back
+
+# Brotli-compressed responses are only requested when urllib3 can decode them
 try:
-    # Search for the page
-    search_results = wikipedia.search(query, results=1)
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, br, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "StockMind/1.0 (educational stock research app)"
+SESSION.headers.update({"Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive"})
+
+_redis = None
+
+
+def encode(obj):
+    """Serialize a result to UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def decode(raw):
+    """Parse JSON bytes or str."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _write(payload):
+    sys.stdout.buffer.write(encode(payload) + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def get_redis():
+    """Lazily create the shared Redis client; None when Redis is unavailable."""
+    global _redis
+    if _redis is None and REDIS_AVAILABLE and REDIS_URL:
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis
 
-    if not search_results:
-        print(json.dumps({"error": "No results found", "summary": "", "fullText": ""}))
-        sys.exit(0)
 
-    # Get the page
-    page = wikipedia.page(search_results[0], auto_suggest=False)
+def _page(title):
+    """
+    Summary, URL and canonical title from the REST summary endpoint plus the
+    plain-text body from the action API, cut to MAX_WIKI_CHARS (truncated
+    says whether it was). None for missing or disambiguation pages.
+    """
+    summary_resp = SESSION.get(
+        WIKI_REST_SUMMARY_URL.format(title=url_quote(title.replace(" ", "_"), safe="")),
+        timeout=WIKI_TIMEOUT,
+    )
+    if summary_resp.status_code != 200:
+        return None
+    summary = summary_resp.json()
+    if summary.get("type") == "disambiguation":
+        return None
 
-    result = {
-        "summary": page.summary,
-        "fullText": page.content,
-        "url": page.url,
-        "title": page.title
+    full_text = ""
+    extract_resp = SESSION.get(WIKI_ACTION_API_URL, timeout=WIKI_TIMEOUT, params={
+        "action": "query", "prop": "extracts", "explaintext": 1,
+        "redirects": 1, "titles": summary.get("title", title), "format": "json",
+    })
+    if extract_resp.status_code == 200:
+        pages = (extract_resp.json().get("query") or {}).get("pages") or {}
+        full_text = next((p.get("extract", "") for p in pages.values()), "")
+
+    full_text = full_text or summary.get("extract", "")
+    return {
+        "summary": summary.get("extract", ""),
+        "fullText": full_text[:MAX_WIKI_CHARS],
+        "truncated": len(full_text) > MAX_WIKI_CHARS,
+        "url": ((summary.get("content_urls") or {}).get("desktop") or {}).get("page", ""),
+        "title": summary.get("title", title),
     }
 
-    print(json.dumps(result))
 
-except wikipedia.exceptions.DisambiguationError as e:
-    # If multiple pages match, use the first option
+def _search(query):
+    """Titles of the top WIKI_SEARCH_CANDIDATES Wikipedia search hits for query."""
+    resp = SESSION.get(WIKI_ACTION_API_URL, timeout=WIKI_TIMEOUT, params={
+        "action": "query", "list": "search", "srsearch": query,
+        "srlimit": WIKI_SEARCH_CANDIDATES, "format": "json",
+    })
+    resp.raise_for_status()
+    hits = (resp.json().get("query") or {}).get("search") or []
+    return [hit["title"] for hit in hits]
+
+
+def _lookup(query):
     try:
-        page = wikipedia.page(e.options[0], auto_suggest=False)
-        result = {
-            "summary": page.summary,
-            "fullText": page.content,
-            "url": page.url,
-            "title": page.title
-        }
-        print(json.dumps(result))
-    except Exception as err:
-        print(json.dumps({"error": str(err), "summary": "", "fullText": ""}))
-
-except wikipedia.exceptions.PageError:
-    print(json.dumps({"error": "Page not found", "summary": "", "fullText": ""}))
-
-except Exception as e:
-    print(json.dumps({"error": str(e), "summary": "", "fullText": ""}))
+        # An exact title needs no search round trip
+        page = _page(query)
+        if page:
+            return page
+
+        titles = _search(query)
+        if not titles:
+            return {"error": "No results found", "summary": "", "fullText": ""}
+
+        # A disambiguation (or vanished) top hit falls through to the next one
+        for title in titles:
+            page = _page(title)
+            if page:
+                return page
+        return {"error": "Page not found", "summary": "", "fullText": ""}
+
+    except Exception as e:
+        return {"error": str(e), "summary": "", "fullText": ""}
+
+
+def fetch(query):
+    """Look up the best-matching Wikipedia page for query."""
+    client = get_redis()
+    key = f"wiki:{query}"
+    if client is not None:
+        try:
+            cached = client.get(key)
+            if cached is not None:
+                return decode(cached)
+        except Exception:
+            client = None  # Redis down: go straight to Wikipedia
+
+    result = _lookup(query)
+    if client is not None and not result.get("error"):
+        try:
+            client.setex(key, WIKI_CACHE_TTL, encode(result))
+        except Exception:
+            pass
+    return result
+
+
+def serve():
+    """Answer newline-delimited JSON requests on stdin until EOF."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        req_id = None
+        try:
+            req = decode(line)
+            req_id = req.get("id")
+            result = fetch(req.get("query", ""))
+        except Exception as e:
+            result = {"error": str(e), "summary": "", "fullText": ""}
+        _write({"id": req_id, "result": result})
+
+
+def main():
+    if len(sys.argv) < 2:
+        _write({"error": "No query provided"})
+        sys.exit(1)
+
+    if sys.argv[1] == "--serve":
+        serve()
+        return
+
+    _write(fetch(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,28 @@
-import requests
-import sys
+import asyncio
+import aiohttp
 
 ports = [3000, 3001, 3002, 3003]
 
-print("Testing Next.js Search API...")
 
-for port in ports:
+async def probe(session, port):
     url = f"http://localhost:{port}/api/stocks/search?q=ama"
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=2)) as response:
+        return response.status, await response.text()
+
+
+async def main():
+    # Probe every port at once; total wait is the slowest probe, not the sum
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*(probe(session, port) for port in ports), return_exceptions=True)
+
+
+print("Testing Next.js Search API...")
+
+for port, result in zip(ports, asyncio.run(main())):
     print(f"\nTesting port {port}...")
-    try:
-        response = requests.get(url, timeout=2)
-        print(f"Status: {response.status_code}")
-        print(f"Body: {response.text}")
-    except Exception as e:
-        print(f"Error: {e}")
+    if isinstance(result, BaseException):
+        print(f"Error: {result!r}")
+    else:
+        status, body = result
+        print(f"Status: {status}")
+        print(f"Body: {body}")